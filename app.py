@@ -1,4 +1,5 @@
 import subprocess
+from concurrent.futures import Future
 import gc
 import io
 import fitz
@@ -7,6 +8,7 @@ import streamlit as st
 import json
 from src.auth import require_login
 from src.pdf_utils import (
+    PdfSession,
     pdf_to_page_images,
     extract_page_texts,
     extract_sheet_metadata,
@@ -14,12 +16,12 @@ from src.pdf_utils import (
     ImageQualityChecker,
     ScaleVerifier,
 )
-from src.page_classifier import TAGS, classify_page
+from src.page_classifier import TAGS, TEXT_ONLY_TAGS, classify_page, is_text_only
 from src.region_extractor import extract_regions
 from src.llm_review import run_review
-from src.report_pdf import build_pdf_report
+from src.report_pdf import build_pdf_report_async
 from src.annotations import assign_issue_ids
-from src.storage import init_db, save_review, get_project_review_history, compare_reviews
+from src.storage import init_db, save_review, list_reviews, get_review_json, compare_reviews, compare_saved_reviews, dumps_result_json
 from src.schemas import ReviewResult
 from src.quality_analysis import ReviewQualityAnalyzer
 
@@ -231,6 +233,12 @@ def display_results(result):
     """Display results with interactive issue management"""
     st.success("✅ Review Complete!")
 
+    # Build the PDF in the background while the results are rendered below.
+    # The build is started once per review and kept across reruns;
+    # report_pdf is reset whenever a new review result is stored.
+    if st.session_state.get("report_pdf") is None:
+        st.session_state.report_pdf = build_pdf_report_async(result)
+
     # Overall Summary
     if result.overall_summary:
         st.subheader("Overall Summary")
@@ -242,7 +250,7 @@ def display_results(result):
     # Display each page's results with interactive controls
     for page in result.pages:
         with st.expander(f"📄 Page {page.page_index} — {page.page_label}", expanded=True):
-            sheet_id = getattr(page, "sheet_id", None) or getattr(page, "sheet_number", None)
+            sheet_id = page.sheet_id
             sheet_title = page.sheet_title or "N/A"
             st.write(f"**Sheet:** {sheet_id or 'N/A'} — {sheet_title}")
 
@@ -270,7 +278,9 @@ def display_results(result):
         )
     with col2:
         try:
-            pdf_bytes = build_pdf_report(result)
+            report_pdf = st.session_state.report_pdf
+            pdf_bytes = report_pdf.result() if isinstance(report_pdf, Future) else report_pdf
+            st.session_state.report_pdf = pdf_bytes
             st.download_button(
                 "📄 Download PDF Report",
                 data=pdf_bytes,
@@ -309,6 +319,16 @@ def main():
     )
     if dpi >= 450:
         st.sidebar.warning("⚠️ High DPI uses significant memory. May cause crashes with large PDFs.")
+    use_response_cache = st.sidebar.checkbox(
+        "Reuse cached model responses",
+        value=True,
+        help="Identical requests (same pages, prompts and model) return the stored response instead of calling the API.",
+    )
+    reuse_near_duplicates = st.sidebar.checkbox(
+        "Reuse reviews of near-duplicate sheets",
+        value=False,
+        help="Sheets that look and read almost the same as a previously reviewed sheet reuse that sheet's findings.",
+    )
 
     # File validation constants
     MAX_FILE_SIZE_MB = 100
@@ -359,275 +379,298 @@ def main():
         st.error(f"❌ Error reading file: {str(e)}")
         st.stop()
 
-    temp_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    page_count = len(temp_doc)
-    temp_doc.close()
-
-    estimated_mb = page_count * (dpi / 300) * (dpi / 300) * 55
-    if estimated_mb > 800:
-        st.error(f"⚠️ This PDF ({page_count} pages @ {dpi} DPI) will use ~{estimated_mb:.0f}MB")
-        st.error("This may crash the app. Please:")
-        st.markdown("- Lower DPI to 200-300")
-        st.markdown("- Or select fewer pages")
-        st.markdown("- Or upload a smaller PDF")
-        st.stop()
-    current_context = (
-        project_name.strip(),
-        ruleset,
-        scale_note,
-        uploaded.name,
-        auto_tagging,
-        use_region_detection,
-    )
-    if st.session_state.get("review_context") != current_context:
-        st.session_state.review_context = current_context
-        st.session_state.review_result = None
-        st.session_state.review_saved = False
-        st.session_state.report_pdf = None
-
-    def _render_pages_with_fallback(source_bytes: bytes, primary_dpi: int):
-        fallback_dpis = [primary_dpi, 350, 300]
-        last_error = None
-        for candidate in fallback_dpis:
-            try:
-                pages_out = pdf_to_page_images(source_bytes, dpi=candidate)
-                return pages_out, candidate
-            except (MemoryError, RuntimeError, ValueError) as exc:
-                last_error = exc
-        raise last_error or RuntimeError("Unable to render PDF pages.")
-
     try:
-        with st.spinner("Processing PDF..."):
-            pages, rendered_dpi = _render_pages_with_fallback(pdf_bytes, dpi)
-            if rendered_dpi != dpi:
-                st.warning(f"⚠️ Rendering at {rendered_dpi} DPI to avoid crashes.")
-            if "processed_pages" in st.session_state:
-                del st.session_state.processed_pages
-            page_texts = extract_page_texts(pdf_bytes)
-            title_blocks = extract_title_block_texts(pdf_bytes, max_pages=len(pages))
-            gc.collect()
+        pdf_session = PdfSession(pdf_bytes)
     except ValueError as e:
         st.error(f"❌ PDF Error: {str(e)}")
-        st.info("Please ensure the file is a valid PDF and try again.")
-        st.stop()
-    except MemoryError:
-        st.error("❌ Out of Memory Error")
-        st.error("This PDF is too large for the available memory. Please:")
-        st.markdown("- Lower the DPI to 200 or 300")
-        st.markdown("- Select fewer pages to process")
-        st.markdown("- Use a smaller PDF file")
         st.stop()
-    except RuntimeError as e:
-        st.error(f"❌ Processing Error: {str(e)}")
-        st.info("Try lowering DPI or using a smaller PDF.")
-        st.stop()
-    except Exception as e:
-        st.error(f"❌ Unexpected Error: {str(e)}")
-        st.exception(e)
-        st.stop()
-
-    st.success(f"✅ Loaded {len(pages)} pages from PDF")
-
-    # Display image quality analysis
-    quality_ok = display_image_quality_report(pages, scale_note, rendered_dpi)
+    # Closed in the finally below, including when st.stop() or an error ends the run early.
+    try:
+        pdf_doc = pdf_session.doc
+        page_count = len(pdf_doc)
+
+        estimated_mb = page_count * (dpi / 300) * (dpi / 300) * 55
+        if estimated_mb > 800:
+            st.error(f"⚠️ This PDF ({page_count} pages @ {dpi} DPI) will use ~{estimated_mb:.0f}MB")
+            st.error("This may crash the app. Please:")
+            st.markdown("- Lower DPI to 200-300")
+            st.markdown("- Or select fewer pages")
+            st.markdown("- Or upload a smaller PDF")
+            st.stop()
+        current_context = (
+            project_name.strip(),
+            ruleset,
+            scale_note,
+            uploaded.name,
+            auto_tagging,
+            use_region_detection,
+        )
+        if st.session_state.get("review_context") != current_context:
+            st.session_state.review_context = current_context
+            st.session_state.review_result = None
+            st.session_state.review_saved = False
+            st.session_state.review_id = None
+            st.session_state.report_pdf = None
 
-    if not quality_ok:
-        st.warning("⚠️ Some image quality issues detected. Review accuracy may be affected.")
+        def _render_pages_with_fallback(source_doc: fitz.Document, primary_dpi: int, grayscale_pages: set[int]):
+            fallback_dpis = [primary_dpi, 350, 300]
+            last_error = None
+            for candidate in fallback_dpis:
+                try:
+                    pages_out = pdf_to_page_images(source_doc, dpi=candidate, grayscale_pages=grayscale_pages)
+                    return pages_out, candidate
+                except (MemoryError, RuntimeError, ValueError) as exc:
+                    last_error = exc
+            raise last_error or RuntimeError("Unable to render PDF pages.")
 
-    selected = []
-    include_all = st.checkbox("Include all pages")
+        try:
+            with st.spinner("Processing PDF..."):
+                page_texts = extract_page_texts(pdf_doc)
+                page_classes = {i: classify_page(text) for i, text in page_texts.items()}
+                # Grayscale only for pages whose final tags are all text-only. The
+                # tag widgets keep the user's choice from the previous run, so a
+                # page re-tagged as a drawing sheet renders in color on this one.
+                text_only_pages = set()
+                if auto_tagging:
+                    for i, classification in page_classes.items():
+                        chosen = st.session_state.get(f"tags_{i}")
+                        if chosen:
+                            if set(chosen) <= TEXT_ONLY_TAGS:
+                                text_only_pages.add(i)
+                        elif is_text_only(classification):
+                            text_only_pages.add(i)
+                pages, rendered_dpi = _render_pages_with_fallback(pdf_doc, dpi, text_only_pages)
+                if rendered_dpi != dpi:
+                    st.warning(f"⚠️ Rendering at {rendered_dpi} DPI to avoid crashes.")
+                if "processed_pages" in st.session_state:
+                    del st.session_state.processed_pages
+                title_blocks = extract_title_block_texts(pdf_doc, max_pages=len(pages))
+                gc.collect()
+        except ValueError as e:
+            st.error(f"❌ PDF Error: {str(e)}")
+            st.info("Please ensure the file is a valid PDF and try again.")
+            st.stop()
+        except MemoryError:
+            st.error("❌ Out of Memory Error")
+            st.error("This PDF is too large for the available memory. Please:")
+            st.markdown("- Lower the DPI to 200 or 300")
+            st.markdown("- Select fewer pages to process")
+            st.markdown("- Use a smaller PDF file")
+            st.stop()
+        except RuntimeError as e:
+            st.error(f"❌ Processing Error: {str(e)}")
+            st.info("Try lowering DPI or using a smaller PDF.")
+            st.stop()
+        except Exception as e:
+            st.error(f"❌ Unexpected Error: {str(e)}")
+            st.exception(e)
+            st.stop()
 
-    for p in pages:
-        with st.expander(f"Page {p.page_index}"):
-            crop_box = None
-            crop_preview = p.png_bytes
+        st.success(f"✅ Loaded {len(pages)} pages from PDF")
 
-            if enable_manual_crop:
-                st.caption("Manual crop window (percentages)")
-                col_a, col_b = st.columns(2)
-                with col_a:
-                    left_pct = st.slider("Left %", 0, 90, 0, key=f"crop_left_{p.page_index}")
-                    top_pct = st.slider("Top %", 0, 90, 0, key=f"crop_top_{p.page_index}")
-                with col_b:
-                    right_pct = st.slider("Right %", 10, 100, 100, key=f"crop_right_{p.page_index}")
-                    bottom_pct = st.slider("Bottom %", 10, 100, 100, key=f"crop_bottom_{p.page_index}")
+        # Display image quality analysis
+        quality_ok = display_image_quality_report(pages, scale_note, rendered_dpi)
 
-                if right_pct <= left_pct or bottom_pct <= top_pct:
-                    st.warning("Crop bounds are invalid. Adjust left/top/right/bottom percentages.")
-                else:
-                    left_px = int(p.width * left_pct / 100)
-                    right_px = int(p.width * right_pct / 100)
-                    top_px = int(p.height * top_pct / 100)
-                    bottom_px = int(p.height * bottom_pct / 100)
-                    crop_box = (left_px, top_px, right_px, bottom_px)
-                    crop_preview = _crop_png_bytes(p.png_bytes, crop_box, p.dpi)
+        if not quality_ok:
+            st.warning("⚠️ Some image quality issues detected. Review accuracy may be affected.")
 
-            st.image(crop_preview, use_container_width=True)
+        selected = []
+        include_all = st.checkbox("Include all pages")
 
-            title_block = title_blocks[p.page_index] if p.page_index < len(title_blocks) else ""
-            page_text = page_texts.get(p.page_index, "")
-            auto_tags = classify_page(page_text) if auto_tagging else {"tags": []}
-            auto_tag_list = [entry["tag"] for entry in auto_tags["tags"]] or ["Floor Plan"]
+        for p in pages:
+            with st.expander(f"Page {p.page_index}"):
+                crop_box = None
+                crop_preview = p.png_bytes
 
-            col1, col2 = st.columns(2)
+                if enable_manual_crop:
+                    st.caption("Manual crop window (percentages)")
+                    col_a, col_b = st.columns(2)
+                    with col_a:
+                        left_pct = st.slider("Left %", 0, 90, 0, key=f"crop_left_{p.page_index}")
+                        top_pct = st.slider("Top %", 0, 90, 0, key=f"crop_top_{p.page_index}")
+                    with col_b:
+                        right_pct = st.slider("Right %", 10, 100, 100, key=f"crop_right_{p.page_index}")
+                        bottom_pct = st.slider("Bottom %", 10, 100, 100, key=f"crop_bottom_{p.page_index}")
 
-            with col1:
-                include_page = st.checkbox(
-                    "Include",
-                    key=f"include_page_{p.page_index}",
-                    disabled=include_all,
-                    value=include_all
-                )
+                    if right_pct <= left_pct or bottom_pct <= top_pct:
+                        st.warning("Crop bounds are invalid. Adjust left/top/right/bottom percentages.")
+                    else:
+                        left_px = int(p.width * left_pct / 100)
+                        right_px = int(p.width * right_pct / 100)
+                        top_px = int(p.height * top_pct / 100)
+                        bottom_px = int(p.height * bottom_pct / 100)
+                        crop_box = (left_px, top_px, right_px, bottom_px)
+                        crop_preview = _crop_png_bytes(p.png_bytes, crop_box, p.dpi)
+
+                st.image(crop_preview, use_container_width=True)
+
+                title_block = title_blocks[p.page_index] if p.page_index < len(title_blocks) else ""
+                page_text = page_texts.get(p.page_index, "")
+                auto_tags = (page_classes.get(p.page_index) or classify_page(page_text)) if auto_tagging else {"tags": []}
+                auto_tag_list = [entry["tag"] for entry in auto_tags["tags"]] or ["Floor Plan"]
+
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    include_page = st.checkbox(
+                        "Include",
+                        key=f"include_page_{p.page_index}",
+                        disabled=include_all,
+                        value=include_all
+                    )
 
-            with col2:
-                selected_tags = st.multiselect(
-                    "Tags",
-                    TAGS,
-                    default=auto_tag_list,
-                    key=f"tags_{p.page_index}",
-                    disabled=not (include_all or include_page),
-                )
+                with col2:
+                    selected_tags = st.multiselect(
+                        "Tags",
+                        TAGS,
+                        default=auto_tag_list,
+                        key=f"tags_{p.page_index}",
+                        disabled=not (include_all or include_page),
+                    )
 
-            if auto_tags["tags"]:
-                tag_lines = [
-                    f"- {entry['tag']} ({entry['confidence']})"
-                    for entry in auto_tags["tags"]
+                if auto_tags["tags"]:
+                    tag_lines = [
+                        f"- {entry['tag']} ({entry['confidence']})"
+                        for entry in auto_tags["tags"]
+                    ]
+                    st.markdown("**Auto tags:**\n" + "\n".join(tag_lines))
+
+                scale_options = [
+                    scale_note,
+                    "1/8\" = 1'-0\"",
+                    "3/16\" = 1'-0\"",
+                    "1/4\" = 1'-0\"",
+                    "3/8\" = 1'-0\"",
+                    "1/2\" = 1'-0\"",
                 ]
-                st.markdown("**Auto tags:**\n" + "\n".join(tag_lines))
-
-            scale_options = [
-                scale_note,
-                "1/8\" = 1'-0\"",
-                "3/16\" = 1'-0\"",
-                "1/4\" = 1'-0\"",
-                "3/8\" = 1'-0\"",
-                "1/2\" = 1'-0\"",
-            ]
-            scale_options = list(dict.fromkeys(scale_options))
-            different_scales = st.checkbox(
-                "Different scales on this sheet",
-                key=f"diff_scales_{p.page_index}",
-                disabled=not (include_all or include_page),
-            )
-
-            if different_scales:
-                plan_scale = st.selectbox(
-                    "Plan scale",
-                    scale_options,
-                    key=f"plan_scale_{p.page_index}",
-                )
-                elevation_scale = st.selectbox(
-                    "Elevation scale",
-                    scale_options,
-                    key=f"elev_scale_{p.page_index}",
-                )
-                rcp_scale = st.selectbox(
-                    "RCP scale",
-                    scale_options,
-                    key=f"rcp_scale_{p.page_index}",
-                )
-                detail_scale = st.selectbox(
-                    "Detail scale",
-                    scale_options,
-                    key=f"detail_scale_{p.page_index}",
+                scale_options = list(dict.fromkeys(scale_options))
+                different_scales = st.checkbox(
+                    "Different scales on this sheet",
+                    key=f"diff_scales_{p.page_index}",
+                    disabled=not (include_all or include_page),
                 )
-                st.session_state.page_scale_overrides[p.page_index] = {
-                    "Floor Plan": plan_scale,
-                    "Interior Elevations": elevation_scale,
-                    "RCP / Ceiling": rcp_scale,
-                    "Details / Sections": detail_scale,
-                    "Door Schedule": detail_scale,
-                    "Notes / Code": detail_scale,
-                }
-            else:
-                st.session_state.page_scale_overrides.pop(p.page_index, None)
 
-            if include_all or include_page:
-                sheet_number, sheet_title = extract_sheet_metadata(
-                    title_block or page_text
-                )
+                if different_scales:
+                    plan_scale = st.selectbox(
+                        "Plan scale",
+                        scale_options,
+                        key=f"plan_scale_{p.page_index}",
+                    )
+                    elevation_scale = st.selectbox(
+                        "Elevation scale",
+                        scale_options,
+                        key=f"elev_scale_{p.page_index}",
+                    )
+                    rcp_scale = st.selectbox(
+                        "RCP scale",
+                        scale_options,
+                        key=f"rcp_scale_{p.page_index}",
+                    )
+                    detail_scale = st.selectbox(
+                        "Detail scale",
+                        scale_options,
+                        key=f"detail_scale_{p.page_index}",
+                    )
+                    st.session_state.page_scale_overrides[p.page_index] = {
+                        "Floor Plan": plan_scale,
+                        "Interior Elevations": elevation_scale,
+                        "RCP / Ceiling": rcp_scale,
+                        "Details / Sections": detail_scale,
+                        "Door Schedule": detail_scale,
+                        "Notes / Code": detail_scale,
+                    }
+                else:
+                    st.session_state.page_scale_overrides.pop(p.page_index, None)
 
-                # Show extracted metadata for debugging
-                st.caption(f"Detected: Sheet {sheet_number or 'N/A'} - {sheet_title or 'N/A'}")
+                if include_all or include_page:
+                    sheet_number, sheet_title = extract_sheet_metadata(
+                        title_block or page_text
+                    )
 
-                tag_fallback = auto_tag_list
-                resolved_tags = selected_tags or tag_fallback
-                primary_tag = resolved_tags[0] if resolved_tags else "Floor Plan"
-                page_label = (
-                    f"Combo: {', '.join(resolved_tags[:3])}"
-                    if len(resolved_tags) > 1
-                    else primary_tag
-                )
-                scale_overrides = st.session_state.page_scale_overrides.get(p.page_index, {})
-                extra_text = (
-                    f"Page text:\n{page_text}\n\n"
-                    f"Title block text (right side):\n{title_block}"
-                )
+                    # Show extracted metadata for debugging
+                    st.caption(f"Detected: Sheet {sheet_number or 'N/A'} - {sheet_title or 'N/A'}")
 
-                if use_region_detection:
-                    regions = extract_regions(
-                        pdf_bytes,
-                        p.page_index,
-                        dpi=rendered_dpi,
-                        selected_tags=resolved_tags,
+                    tag_fallback = auto_tag_list
+                    resolved_tags = selected_tags or tag_fallback
+                    primary_tag = resolved_tags[0] if resolved_tags else "Floor Plan"
+                    page_label = (
+                        f"Combo: {', '.join(resolved_tags[:3])}"
+                        if len(resolved_tags) > 1
+                        else primary_tag
+                    )
+                    scale_overrides = st.session_state.page_scale_overrides.get(p.page_index, {})
+                    extra_text = (
+                        f"Page text:\n{page_text}\n\n"
+                        f"Title block text (right side):\n{title_block}"
                     )
-                    st.markdown("**Detected regions:**")
-                    for region in regions:
-                        st.image(
-                            region["png_bytes"],
-                            caption=f"{region['tag']} ({region['confidence']})",
-                            use_container_width=True,
+
+                    if use_region_detection:
+                        regions = extract_regions(
+                            pdf_doc,
+                            p.page_index,
+                            dpi=rendered_dpi,
+                            selected_tags=resolved_tags,
+                            page_png=p.png_bytes,
                         )
+                        st.markdown("**Detected regions:**")
+                        for region in regions:
+                            st.image(
+                                region["png_bytes"],
+                                caption=f"{region['tag']} ({region['confidence']})",
+                                use_container_width=True,
+                            )
+                            selected.append(
+                                {
+                                    "page_index": p.page_index,
+                                    "page_label": page_label,
+                                    "tag": region["tag"],
+                                    "region_bbox": region["bbox"],
+                                    "anchor_text": region["anchor_text"],
+                                    "scale_note": scale_overrides.get(region["tag"], scale_note),
+                                    "png_bytes": region["png_bytes"],
+                                    "sheet_id_hint": sheet_number,
+                                    "sheet_title_hint": sheet_title,
+                                    "extra_text": extra_text,
+                                }
+                            )
+                    else:
+                        dimension_heavy = {
+                            "Floor Plan",
+                            "Interior Elevations",
+                            "Door Schedule",
+                            "RCP / Ceiling",
+                            "Reflected Ceiling Plan",
+                        }
+                        if any(tag in dimension_heavy for tag in resolved_tags):
+                            img_choice = "enhanced"
+                        else:
+                            img_choice, _ = ImageQualityChecker.choose_best_for_vision(
+                                p.png_bytes,
+                                p.enhanced_png_bytes,
+                            )
+                        png_bytes = p.enhanced_png_bytes if img_choice == "enhanced" else p.png_bytes
+                        if crop_box:
+                            png_bytes = _crop_png_bytes(png_bytes, crop_box, p.dpi)
                         selected.append(
                             {
                                 "page_index": p.page_index,
                                 "page_label": page_label,
-                                "tag": region["tag"],
-                                "region_bbox": region["bbox"],
-                                "anchor_text": region["anchor_text"],
-                                "scale_note": scale_overrides.get(region["tag"], scale_note),
-                                "png_bytes": region["png_bytes"],
+                                "tag": ", ".join(resolved_tags),
+                                "scale_note": scale_note,
+                                "png_bytes": png_bytes,
                                 "sheet_id_hint": sheet_number,
                                 "sheet_title_hint": sheet_title,
                                 "extra_text": extra_text,
                             }
                         )
-                else:
-                    dimension_heavy = {
-                        "Floor Plan",
-                        "Interior Elevations",
-                        "Door Schedule",
-                        "RCP / Ceiling",
-                        "Reflected Ceiling Plan",
-                    }
-                    if any(tag in dimension_heavy for tag in resolved_tags):
-                        img_choice = "enhanced"
-                    else:
-                        img_choice, _ = ImageQualityChecker.choose_best_for_vision(
-                            p.png_bytes,
-                            p.enhanced_png_bytes,
-                        )
-                    png_bytes = p.enhanced_png_bytes if img_choice == "enhanced" else p.png_bytes
-                    if crop_box:
-                        png_bytes = _crop_png_bytes(png_bytes, crop_box, p.dpi)
-                    selected.append(
-                        {
-                            "page_index": p.page_index,
-                            "page_label": page_label,
-                            "tag": ", ".join(resolved_tags),
-                            "scale_note": scale_note,
-                            "png_bytes": png_bytes,
-                            "sheet_id_hint": sheet_number,
-                            "sheet_title_hint": sheet_title,
-                            "extra_text": extra_text,
-                        }
-                    )
-                    if img_choice == "enhanced":
-                        p.png_bytes = None
-                    else:
-                        p.enhanced_png_bytes = None
+                        if img_choice == "enhanced":
+                            p.png_bytes = None
+                        else:
+                            p.enhanced_png_bytes = None
 
-            gc.collect()
+                gc.collect()
+    finally:
+        pdf_session.close()
 
     selected_page_indices = sorted({p["page_index"] for p in selected})
     st.write(f"**Selected pages:** {selected_page_indices}")
@@ -637,25 +680,29 @@ def main():
         display_results(review_result)
 
         # Check for previous reviews
-        history = get_project_review_history(project_name.strip(), limit=2)
+        history = list_reviews(project_name.strip(), limit=2)
         if len(history) >= 2:
             st.info("📂 Previous review found for this project")
 
             if st.checkbox("Compare with previous review"):
-                old_review = load_review_package(history[1]["result"])
-                comparison = compare_reviews(
-                    old_review.model_dump(),
-                    review_result.model_dump(),
-                )
+                if history[0]["id"] == st.session_state.get("review_id"):
+                    # Both reviews are stored: diff them in SQLite.
+                    comparison = compare_saved_reviews(history[1]["id"], history[0]["id"])
+                else:
+                    old_review = load_review_package(get_review_json(history[1]["id"]))
+                    comparison = compare_reviews(
+                        old_review.model_dump(),
+                        review_result.model_dump(),
+                    )
                 display_comparison(comparison)
 
         # Save to database once per run
         if not st.session_state.review_saved:
-            save_review(
+            st.session_state.review_id = save_review(
                 project_name.strip(),
                 ruleset,
                 scale_note,
-                json.dumps({"review": review_result.model_dump()}),
+                dumps_result_json({"review": review_result.model_dump()}),
             )
             st.session_state.review_saved = True
             st.success("💾 Review saved to database")
@@ -738,6 +785,13 @@ def main():
         st.divider()
         st.info(f"📊 Analyzing {len(selected)} page(s) with ruleset: {ruleset}")
 
+        progress_note = st.empty()
+        reviewed_pages: set[int] = set()
+
+        def _show_review_progress(pages):
+            reviewed_pages.update(page["page_index"] for page in pages)
+            progress_note.caption(f"Reviewed pages so far: {sorted(reviewed_pages)}")
+
         try:
             with st.spinner("🔍 Running accessibility review... This may take 30-60 seconds per page."):
                 result = run_review(
@@ -750,7 +804,11 @@ def main():
                     provider=provider,
                     gemini_api_key=gemini_key,
                     gemini_model=gemini_model,
+                    use_cache=use_response_cache,
+                    reuse_near_duplicates=reuse_near_duplicates,
+                    on_pages_reviewed=_show_review_progress,
                 )
+            progress_note.empty()
 
             # Debug: Show raw result structure
             with st.expander("🔧 Debug: Raw Result Data"):
@@ -759,6 +817,7 @@ def main():
             result = assign_issue_ids(result)
             st.session_state.review_result = result
             st.session_state.review_saved = False
+            st.session_state.review_id = None
             st.session_state.report_pdf = None
             render_review_output(result)
 
@@ -1,17 +1,39 @@
+import asyncio
 import base64
+import difflib
+import hashlib
+import io
 import json
+import os
 import re
+import time
 import importlib.util
-from typing import List, Dict, Optional
-
-from openai import OpenAI
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, List, Dict, Optional
+
+from PIL import Image
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+from .pdf_utils import _digest_cached, _image_digest
 from .schemas import ReviewResult
+from .storage import find_page_reviews, get_cached_response, save_cached_response, save_page_review
+
+orjson = None
+if importlib.util.find_spec("orjson") is not None:
+    import orjson
+
+json_repair = None
+if importlib.util.find_spec("json_repair") is not None:
+    import json_repair
 
 # --- Gemini imports ---
 genai = None
 gemini_types = None
+gemini_errors = None
 if importlib.util.find_spec("google.genai") is not None:
     from google import genai
+    from google.genai import errors as gemini_errors
     from google.genai import types as gemini_types
 
 
@@ -96,32 +118,10 @@ TAG_TO_PAGE_TYPE = {
 
 
 def _normalize_tag(tag: str) -> str:
-    if tag in TAG_TO_PAGE_TYPE:
-        return TAG_TO_PAGE_TYPE[tag]
-    return tag
-
-
-def build_enhanced_prompt(page_label: str, ruleset: str) -> str:
-    """Build a targeted prompt with emphasis on code citations and confidence"""
-    normalized = _normalize_tag(page_label)
-    analysis_guide = PAGE_TYPE_ANALYSIS.get(normalized, PAGE_TYPE_ANALYSIS["Other"])
-
-    prompt = f"""
-For this {page_label}, focus your accessibility review on these specific areas:
-
-FOCUS AREAS FOR {page_label.upper()}:
-"""
-    for i, area in enumerate(analysis_guide["focus_areas"], 1):
-        prompt += f"\n{i}. {area}"
-
-    prompt += f"""
+    return TAG_TO_PAGE_TYPE.get(tag, tag)
 
-CRITICAL MEASUREMENTS TO VERIFY:
-"""
-    for measurement in analysis_guide["critical_measurements"]:
-        prompt += f"\n- {measurement}"
 
-    prompt += f"""
+MEASUREMENT_AND_REFERENCE_GUIDE = """
 
 MEASUREMENT EXTRACTION INSTRUCTIONS (CRITICAL FOR HIGH CONFIDENCE):
 1. Look carefully for dimension text on the drawing (e.g., "3'-0\"", "32\"", "5'6\"", "2-10")
@@ -154,8 +154,8 @@ Examples of WRONG references:
 
 """
 
-    if ruleset == "FHA":
-        prompt += """
+RULESET_PROMPT_BLOCKS = {
+    "FHA": """
 FHA CODE REFERENCES (Fair Housing Act - 24 CFR 100.205):
 - Doors (32" clear): FHA 24 CFR 100.205(c)(3)(i)
 - Routes (36" wide): FHA 24 CFR 100.205(c)(3)(ii)
@@ -169,9 +169,8 @@ CONFIDENCE STANDARDS FOR FHA:
 - HIGH: Dimension is labeled and clearly visible on plan (e.g., you see "2'-10\"" marked on door)
 - MEDIUM: You can measure using scale bar but no direct dimension label shown
 - LOW: Critical dimension is missing, unclear, or requires field verification
-"""
-    elif "TYPE_A" in ruleset:
-        prompt += """
+""",
+    "TYPE_A": """
 ANSI A117.1 TYPE A CODE REFERENCES (ICC/ANSI A117.1-2017):
 - Doors (32" clear): ANSI A117.1 Section 1003.5
 - Routes (36" continuous): ANSI A117.1 Section 1003.3
@@ -186,9 +185,8 @@ CONFIDENCE STANDARDS FOR TYPE A:
 - HIGH: Dimension clearly visible and readable on plan drawings
 - MEDIUM: Can infer from context or typical dimensions but not explicitly labeled
 - LOW: Requires field verification or dimension not shown on drawings
-"""
-    elif "TYPE_B" in ruleset:
-        prompt += """
+""",
+    "TYPE_B": """
 ANSI A117.1 TYPE B CODE REFERENCES (ICC/ANSI A117.1-2017):
 - Doors (32" clear, 31.75" bath OK): ANSI A117.1 Section 1004.5
 - Routes (36" min width): ANSI A117.1 Section 1004.3
@@ -202,9 +200,10 @@ CONFIDENCE STANDARDS FOR TYPE B:
 - HIGH: Reinforcement locations clearly marked, dimensions visible
 - MEDIUM: Can infer compliance from typical construction details
 - LOW: Cannot verify without field inspection or construction documents
-"""
+""",
+}
 
-    prompt += """
+PROMPT_QUALITY_CHECKLIST = """
 
 QUALITY CHECKLIST BEFORE SUBMITTING (CRITICAL):
 1. ✅ EVERY issue includes: severity, location_hint, finding, recommendation, reference, confidence, measurement
@@ -224,7 +223,45 @@ If you have < 50% HIGH confidence, re-examine drawings for visible dimensions.
 If any issue lacks a code reference, add the specific code section.
 """
 
-    return prompt
+
+def _ruleset_prompt_block(ruleset: str) -> str:
+    if ruleset == "FHA":
+        return RULESET_PROMPT_BLOCKS["FHA"]
+    if "TYPE_A" in ruleset:
+        return RULESET_PROMPT_BLOCKS["TYPE_A"]
+    if "TYPE_B" in ruleset:
+        return RULESET_PROMPT_BLOCKS["TYPE_B"]
+    return ""
+
+
+@lru_cache(maxsize=32)
+def build_page_tail(page_label: str) -> str:
+    """Page-type focus areas and measurements (the only page-specific prompt text)"""
+    normalized = _normalize_tag(page_label)
+    analysis_guide = PAGE_TYPE_ANALYSIS.get(normalized, PAGE_TYPE_ANALYSIS["Other"])
+
+    focus_areas = "".join(f"\n{i}. {area}" for i, area in enumerate(analysis_guide["focus_areas"], 1))
+    measurements = "".join(f"\n- {measurement}" for measurement in analysis_guide["critical_measurements"])
+
+    return "".join((
+        f"\nFor this {page_label}, focus your accessibility review on these specific areas:\n\n"
+        f"FOCUS AREAS FOR {page_label.upper()}:\n",
+        focus_areas,
+        "\n\nCRITICAL MEASUREMENTS TO VERIFY:\n",
+        measurements,
+    ))
+
+
+@lru_cache(maxsize=8)
+def build_static_ruleset_block(ruleset: str) -> str:
+    """Measurement guide, code references and checklist shared by every page"""
+    return "".join((MEASUREMENT_AND_REFERENCE_GUIDE, _ruleset_prompt_block(ruleset), PROMPT_QUALITY_CHECKLIST))
+
+
+@lru_cache(maxsize=64)
+def build_enhanced_prompt(page_label: str, ruleset: str) -> str:
+    """Build a targeted prompt with emphasis on code citations and confidence"""
+    return build_page_tail(page_label) + build_static_ruleset_block(ruleset)
 
 
 # IMPROVED System instructions with emphasis on quality
@@ -341,82 +378,293 @@ AGENTIC VISION REQUIREMENTS (Gemini Code Execution):
 - Use code execution to measure pixel distances if scale is provided
 """
 
+# The system text plus the ruleset block is the static prefix of every
+# request: byte-identical across pages and runs so provider prompt caching
+# (OpenAI automatic prefix caching, Gemini implicit caching) can hit. Only
+# the page tail, extracted text and image vary after it.
+# When references are optional the override goes last, so both variants
+# share the same leading prefix.
+_GEMINI_SYSTEM_TEXT = SYSTEM_INSTRUCTIONS.strip() + "\n\n" + AGENTIC_VISION_ADDENDUM.strip()
+
+REFERENCES_OPTIONAL_NOTE = """
+REFERENCE OVERRIDE FOR THIS REVIEW:
+- Cite a code section only when you can identify the specific section
+- Otherwise set "reference" to null instead of guessing
+"""
+_REFERENCE_NOTES = {True: "", False: REFERENCES_OPTIONAL_NOTE}
+
+
+@lru_cache(maxsize=16)
+def _openai_system_message(ruleset: str, require_references: bool = True) -> dict:
+    content = SYSTEM_INSTRUCTIONS + build_static_ruleset_block(ruleset) + _REFERENCE_NOTES[require_references]
+    return {"role": "system", "content": content}
+
+
+@lru_cache(maxsize=16)
+def _gemini_system_text(ruleset: str, require_references: bool = True, code_execution: bool = True) -> str:
+    base = _GEMINI_SYSTEM_TEXT if code_execution else SYSTEM_INSTRUCTIONS.strip()
+    return base + "\n" + build_static_ruleset_block(ruleset) + _REFERENCE_NOTES[require_references]
+
+
+# Render every known page type and ruleset at import, so review calls (and the
+# first run after a restart) only hit the caches above.
+for _label in (*PAGE_TYPE_ANALYSIS, *TAG_TO_PAGE_TYPE):
+    build_page_tail(_label)
+for _ruleset in ("FHA", "ANSI_A1171_TYPE_A", "ANSI_A1171_TYPE_B"):
+    for _require_references in (True, False):
+        _openai_system_message(_ruleset, _require_references)
+        _gemini_system_text(_ruleset, _require_references)
+del _label, _ruleset, _require_references
+
+
+MAX_EXTRA_TEXT_CHARS = 2500
+# Share of the clip taken from the end of the text: app.py appends the title
+# block after the page text, and it carries the sheet number and title.
+EXTRA_TEXT_TAIL_CHARS = 800
+
+
+def _clip_extra_text(p: dict) -> str:
+    text = p.get("extra_text") or ""
+    if len(text) > MAX_EXTRA_TEXT_CHARS:
+        head = MAX_EXTRA_TEXT_CHARS - EXTRA_TEXT_TAIL_CHARS
+        return f"{text[:head]}\n[...]\n{text[-EXTRA_TEXT_TAIL_CHARS:]}"
+    return text
 
-def _png_to_data_url(png_bytes: bytes) -> str:
-    b64 = base64.b64encode(png_bytes).decode("utf-8")
-    return f"data:image/png;base64,{b64}"
 
+class _OrjsonBodyMixin:
+    """httpx client mixin that serializes JSON request bodies with orjson.
 
-def _extract_output_text(response) -> str | None:
-    if hasattr(response, "output_text") and response.output_text:
-        return response.output_text
-    if hasattr(response, "choices") and response.choices:
-        return response.choices[0].message.content
-    if hasattr(response, "output"):
-        for item in response.output:
-            for content in getattr(item, "content", []) or []:
-                if getattr(content, "type", None) in {"output_text", "text"}:
-                    return content.text
+    The OpenAI SDK hands request bodies to httpx as ``json=...``, which goes
+    through stdlib ``json.dumps``. Page images are embedded as multi-MB base64
+    strings, so encoding with orjson is noticeably cheaper.
+    """
+
+    def build_request(self, *args, **kwargs):
+        body = kwargs.get("json")
+        if orjson is not None and body is not None and not kwargs.get("files"):
+            try:
+                kwargs["content"] = orjson.dumps(body)
+            except TypeError:
+                pass
+            else:
+                kwargs.pop("json")
+        return super().build_request(*args, **kwargs)
+
+
+class _OrjsonHttpxClient(_OrjsonBodyMixin, DefaultHttpxClient):
+    pass
+
+
+class _OrjsonAsyncHttpxClient(_OrjsonBodyMixin, DefaultAsyncHttpxClient):
+    pass
+
+
+@lru_cache(maxsize=4)
+def _get_openai_client(api_key: str) -> OpenAI:
+    """Shared sync client per API key so its connection pool stays warm between calls.
+
+    The async review path creates its client inside each asyncio.run loop
+    instead: httpx async connections cannot outlive the loop they were opened on.
+    """
+    return OpenAI(api_key=api_key, http_client=_OrjsonHttpxClient())
+
+
+# OpenAI high-detail vision input: fit within 2048x2048, then scale the
+# shortest side down to 768px. Anything larger is resized server-side anyway.
+VISION_MAX_SIDE = 2048
+VISION_SHORT_SIDE = 768
+VISION_JPEG_QUALITY = 85
+# Gemini tiles large images instead of shrinking them to a fixed grid, and its
+# code execution zooms into regions, so it keeps more resolution.
+GEMINI_IMAGE_MAX_SIDE = 3072
+
+
+_VISION_GRID_CACHE: dict = {}
+
+
+def _fit_to_vision_grid(
+    png_bytes: bytes,
+    max_side: int = VISION_MAX_SIDE,
+    short_side: Optional[int] = VISION_SHORT_SIDE,
+) -> bytes:
+    """Downscale a page image to the size the vision model actually sees.
+
+    Resized images are re-encoded as JPEG, which is far smaller and faster to
+    encode than PNG at this size. Images already within bounds pass through.
+    """
+    key = (_image_digest(png_bytes), max_side, short_side)
+    # None marks a pass-through, so the cache never holds the original bytes.
+    resized = _digest_cached(_VISION_GRID_CACHE, key, lambda: _resize_for_vision(png_bytes, max_side, short_side))
+    return png_bytes if resized is None else resized
+
+
+def _resize_for_vision(png_bytes: bytes, max_side: int, short_side: Optional[int]) -> Optional[bytes]:
+    img = Image.open(io.BytesIO(png_bytes))
+    width, height = img.size
+    scale = min(1.0, max_side / max(width, height))
+    if short_side:
+        scale *= min(1.0, short_side / (min(width, height) * scale))
+    if scale >= 1.0:
+        return None
+    resized = img.convert("RGB").resize(
+        (max(1, round(width * scale)), max(1, round(height * scale))),
+        Image.LANCZOS,
+    )
+    buf = io.BytesIO()
+    resized.save(buf, format="JPEG", quality=VISION_JPEG_QUALITY, optimize=True)
+    return buf.getvalue()
+
+
+def _image_mime(image_bytes: bytes) -> str:
+    return "image/jpeg" if image_bytes[:3] == b"\xff\xd8\xff" else "image/png"
+
+
+_DATA_URL_CACHE: dict = {}
+
+
+def _encode_data_url(image_bytes: bytes) -> str:
+    b64 = base64.b64encode(image_bytes).decode("ascii")
+    return f"data:{_image_mime(image_bytes)};base64,{b64}"
+
+
+def _image_to_data_url(image_bytes: bytes) -> str:
+    return _digest_cached(_DATA_URL_CACHE, (_image_digest(image_bytes),), lambda: _encode_data_url(image_bytes))
+
+
+def _page_data_url(p: dict, max_side: int = VISION_MAX_SIDE) -> str:
+    return _image_to_data_url(_fit_to_vision_grid(p["png_bytes"], max_side))
+
+
+def _with_data_urls(page_payloads: list[dict], max_side: int = VISION_MAX_SIDE) -> list[dict]:
+    """Encode page images on a thread pool ahead of request building.
+
+    PIL resizing/JPEG encoding and base64 release the GIL, so pages encode in
+    parallel. Returns shallow copies carrying image_url; pages that already
+    have one are passed through untouched.
+    """
+    pending = [p for p in page_payloads if not p.get("image_url")]
+    if not pending:
+        return page_payloads
+    with ThreadPoolExecutor(max_workers=min(len(pending), os.cpu_count() or 1)) as pool:
+        urls = iter(pool.map(lambda p: _page_data_url(p, max_side), pending))
+        return [p if p.get("image_url") else {**p, "image_url": next(urls)} for p in page_payloads]
+
+
+_DECODER = json.JSONDecoder()
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_JSON_STRUCTURE_RE = re.compile(r'[{}"\\]')
+
+
+def _raw_decode(text: str, start: int = 0):
+    try:
+        parsed, _ = _DECODER.raw_decode(text, start)
+        return parsed
+    except json.JSONDecodeError:
+        return None
+
+
+def _first_json_object(text: str) -> str | None:
+    """Return the first balanced {...} span, ignoring braces inside strings."""
+    start = text.find("{")
+    if start == -1:
+        return None
+    depth = 0
+    in_string = False
+    skip_at = -1
+    for match in _JSON_STRUCTURE_RE.finditer(text, start):
+        pos = match.start()
+        if pos == skip_at:
+            continue
+        ch = text[pos]
+        if in_string:
+            if ch == "\\":
+                skip_at = pos + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:pos + 1]
     return None
 
 
-def _coerce_json(text: str) -> dict:
+def _parse_json(text: str) -> tuple[dict, bool]:
+    """Parse an LLM response; the flag is True only when the text was plain JSON.
+
+    Fenced, prose-wrapped, comma-fixed or repaired responses come back with
+    False so callers can keep them out of the response cache.
+    """
     if not text or not isinstance(text, str):
         raise ValueError("LLM response was empty.")
     cleaned = text.strip()
 
-    def _strip_trailing_commas(payload: str) -> str:
-        return re.sub(r",\s*([}\]])", r"\1", payload)
-
-    decoder = json.JSONDecoder()
-
     try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
+        return (orjson.loads(cleaned) if orjson is not None else json.loads(cleaned)), True
+    except ValueError:
         pass
 
-    try:
-        parsed, _ = decoder.raw_decode(cleaned)
+    return _coerce_lenient(text, cleaned), False
+
+
+def _coerce_json(text: str) -> dict:
+    return _parse_json(text)[0]
+
+
+def _coerce_lenient(text: str, cleaned: str) -> dict:
+    parsed = _raw_decode(cleaned)
+    if parsed is not None:
         return parsed
-    except json.JSONDecodeError:
-        pass
 
-    if "```json" in cleaned:
-        start = cleaned.find("```json") + 7
-        end = cleaned.find("```", start)
-        if end > start:
-            try:
-                return json.loads(cleaned[start:end].strip())
-            except json.JSONDecodeError:
-                pass
+    if cleaned.startswith("```"):
+        fenced = cleaned[3:]
+        if fenced.startswith("json"):
+            fenced = fenced[4:]
+        fenced = fenced.partition("```")[0].strip()
+        parsed = _raw_decode(fenced)
+        if parsed is not None:
+            return parsed
 
     start = cleaned.find("{")
-    end = cleaned.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        extracted = cleaned[start:end + 1].strip()
-        for candidate in (extracted, _strip_trailing_commas(extracted)):
-            try:
-                return json.loads(candidate)
-            except json.JSONDecodeError:
-                try:
-                    parsed, _ = decoder.raw_decode(candidate)
-                    return parsed
-                except json.JSONDecodeError:
-                    continue
+    if start != -1:
+        # At 0 this is the same parse that already failed above.
+        if start > 0:
+            parsed = _raw_decode(cleaned, start)
+            if parsed is not None:
+                return parsed
+        candidate = _first_json_object(cleaned[start:])
+        if candidate:
+            parsed = _raw_decode(_TRAILING_COMMA_RE.sub(r"\1", candidate))
+            if parsed is not None:
+                return parsed
+
+    # Last resort for truncated output (unterminated strings, missing closers).
+    if json_repair is not None and start != -1:
+        repaired = json_repair.loads(cleaned[start:])
+        if isinstance(repaired, dict) and repaired:
+            return repaired
 
     raise ValueError(f"LLM response was not valid JSON. First 500 chars: {text[:500]}")
 
 
-def _coerce_choice(value: str | None, allowed: set[str], fallback: str) -> str:
+_SEVERITY_SET = frozenset(("High", "Medium", "Low"))
+_RULESET_SET = frozenset(("FHA", "ANSI_A1171_TYPE_A", "ANSI_A1171_TYPE_B"))
+
+
+def _coerce_choice(value: str | None, allowed: frozenset[str], fallback: str) -> str:
     if value in allowed:
         return value
     return fallback
 
 
-def _normalize_payload(payload: dict, project_name, ruleset, scale_note, page_payloads):
+def _normalize_payload(payload: dict, project_name, ruleset, scale_note, page_payloads, require_references: bool = True):
     if not isinstance(payload, dict):
         raise ValueError("LLM response was not an object.")
-    data = dict(payload)
+    # Payloads are always freshly parsed or merged by the caller, so normalize in place.
+    data = payload
     data.setdefault("project_name", project_name or "")
     data.setdefault("ruleset", ruleset)
     data.setdefault("scale_note", scale_note or "")
@@ -442,16 +690,13 @@ def _normalize_payload(payload: dict, project_name, ruleset, scale_note, page_pa
         if not isinstance(page, dict):
             continue
         payload_fallback = page_payloads[idx] if idx < len(page_payloads) else {}
-        if page.get("page_index") is None:
+        page_index = page.get("page_index")
+        if page_index is None:
             page_index = payload_fallback.get("page_index", idx)
-        else:
-            page_index = page.get("page_index")
         hint = page_hints.get(page_index, {})
-        if page.get("page_label") is None:
-            payload_label = payload_fallback.get("page_label", "Combo Sheet")
-            page_label = hint.get("page_label") or payload_label
-        else:
-            page_label = page.get("page_label")
+        page_label = page.get("page_label")
+        if page_label is None:
+            page_label = hint.get("page_label") or payload_fallback.get("page_label", "Combo Sheet")
         sheet_id = page.get("sheet_id") or page.get("sheet_number", "")
         sheet_title = page.get("sheet_title", "")
         if not sheet_id:
@@ -470,8 +715,12 @@ def _normalize_payload(payload: dict, project_name, ruleset, scale_note, page_pa
         for issue in issues:
             if not isinstance(issue, dict):
                 continue
-            severity = _coerce_choice(issue.get("severity"), {"High", "Medium", "Low"}, "Low")
-            confidence = _coerce_choice(issue.get("confidence"), {"High", "Medium", "Low"}, "Low")
+            severity = issue.get("severity")
+            if severity not in _SEVERITY_SET:
+                severity = "Low"
+            confidence = issue.get("confidence")
+            if confidence not in _SEVERITY_SET:
+                confidence = "Low"
             reference = issue.get("reference")
             if require_references and not reference:
                 reference = "Reference needed"
@@ -497,113 +746,732 @@ def _normalize_payload(payload: dict, project_name, ruleset, scale_note, page_pa
             }
         )
     data["pages"] = normalized_pages
-    data["ruleset"] = _coerce_choice(
-        data.get("ruleset"),
-        {"FHA", "ANSI_A1171_TYPE_A", "ANSI_A1171_TYPE_B"},
-        ruleset
-    )
+    data["ruleset"] = _coerce_choice(data.get("ruleset"), _RULESET_SET, ruleset)
     return data
 
 
-def _build_openai_content(project_name, ruleset, scale_note, page_payloads):
-    content = [
-        {"type": "text", "text": f"""Project: {project_name}
-Ruleset: {ruleset}
-Scale: {scale_note}
+def _openai_page_content(p: dict, ruleset: str, scale_note: str, extra_text: str) -> list[dict]:
+    page_label = p.get("page_label", "Combo Sheet")
+    region_tag = p.get("tag", page_label)
+    page_tail = build_page_tail(_normalize_tag(region_tag))
+
+    parts = [
+        {"type": "text", "text": f"\n\n=== PAGE {p['page_index']} — {page_label} ==="},
+        {"type": "text", "text": f"REGION TAG: {region_tag}"},
+        {"type": "text", "text": f"Scale note for this region: {p.get('scale_note', scale_note)}"},
+    ]
+    if p.get("anchor_text"):
+        parts.append({"type": "text", "text": f"Anchor: {p['anchor_text']}"})
+    parts.append({"type": "text", "text": page_tail})
+    if extra_text:
+        parts.append({"type": "text", "text": f"Extracted text from this page:\n{extra_text}"})
+    image_url = p.get("image_url") or _page_data_url(p)
+    parts.append({"type": "image_url", "image_url": {"url": image_url}})
+    return parts
 
-CRITICAL QUALITY REQUIREMENTS:
+
+OPENAI_QUALITY_REQUIREMENTS = """CRITICAL QUALITY REQUIREMENTS:
 1. EVERY issue MUST have a code reference with section number (100% required)
 2. At least 50% of issues should be HIGH confidence (if dimensions visible)
 3. EVERY issue MUST have a measurement (extracted or "Not dimensioned")
 4. Typical floor plan = 10-20 issues minimum (not 5-7)
 
 Return strict JSON only.
-"""}
-    ]
+"""
+
 
+def _build_openai_content(project_name, ruleset, scale_note, page_payloads):
+    header = {"type": "text", "text": f"""{OPENAI_QUALITY_REQUIREMENTS}
+Project: {project_name}
+Ruleset: {ruleset}
+Scale: {scale_note}
+"""}
+    content = [header]
+    # Region crops of one sheet all carry that sheet's text; send it once.
+    first_page_with_text: dict[str, int] = {}
     for p in page_payloads:
-        page_label = p.get("page_label", "Combo Sheet")
-        region_tag = p.get("tag", page_label)
-        tag_label = _normalize_tag(region_tag)
-        enhanced_prompt = build_enhanced_prompt(tag_label, ruleset)
-
-        content.append({"type": "text", "text": f"\n\n=== PAGE {p['page_index']} — {page_label} ==="})
-        content.append({"type": "text", "text": f"REGION TAG: {region_tag}"})
-        content.append({"type": "text", "text": f"Scale note for this region: {p.get('scale_note', scale_note)}"})
-        if p.get("anchor_text"):
-            content.append({"type": "text", "text": f"Anchor: {p['anchor_text']}"})
-        content.append({"type": "text", "text": enhanced_prompt})
-
-        if p.get("extra_text"):
-            content.append({"type": "text", "text": f"Extracted text from this page:\n{p['extra_text'][:8000]}"})
-
-        content.append(
-            {
-                "type": "image_url",
-                "image_url": {"url": _png_to_data_url(p["png_bytes"])},
-            }
-        )
+        extra_text = _clip_extra_text(p)
+        if extra_text in first_page_with_text:
+            extra_text = f"[same as PAGE {first_page_with_text[extra_text]} above]"
+        elif extra_text:
+            first_page_with_text[extra_text] = p.get("page_index", 0)
+        content.extend(_openai_page_content(p, ruleset, scale_note, extra_text))
     return content
 
 
-def _openai_run_review(
-    openai_api_key: str,
-    project_name: str,
-    ruleset: str,
-    scale_note: str,
+OPENAI_MAX_TOKENS = 8000
+
+# Rough completion size per page at the issue counts the prompts ask for
+# (~150 tokens per issue). Unknown or combo tags use the floor plan budget.
+EXPECTED_OUTPUT_TOKENS = {
+    "Floor Plan": 3000,
+    "Interior Elevation": 1500,
+    "Door Schedule": 1200,
+    "Reflected Ceiling Plan": 900,
+    "Other": 1200,
+}
+
+
+def _estimate_page_tokens(p: dict) -> int:
+    tag = _normalize_tag(p.get("tag", p.get("page_label", "")))
+    return EXPECTED_OUTPUT_TOKENS.get(tag, EXPECTED_OUTPUT_TOKENS["Floor Plan"])
+
+
+# Input-side limits per request, so a long sheet set never builds one
+# oversized prompt. Image cost is the vision-grid worst case (2048x768 at
+# 512px tiles: 8 x 170 + 85); text is estimated at ~4 characters per token.
+OPENAI_MAX_INPUT_TOKENS = 80_000
+OPENAI_MAX_PAGES_PER_REQUEST = 8
+VISION_IMAGE_TOKENS = 1445
+
+
+def _estimate_input_tokens(p: dict) -> int:
+    tail = build_page_tail(_normalize_tag(p.get("tag", p.get("page_label", "Combo Sheet"))))
+    return (len(tail) + len(_clip_extra_text(p))) // 4 + VISION_IMAGE_TOKENS
+
+
+def _bucket_pages(
     page_payloads: list[dict],
-    model_name: str = "gpt-4o",
-) -> ReviewResult:
-    client = OpenAI(api_key=openai_api_key)
-    content = _build_openai_content(project_name, ruleset, scale_note, page_payloads)
+    token_budget: int,
+    input_budget: int = OPENAI_MAX_INPUT_TOKENS,
+    max_pages: int = OPENAI_MAX_PAGES_PER_REQUEST,
+) -> list[list[dict]]:
+    """Greedily group pages so each request's expected output and input fit their budgets."""
+    buckets: list[list[dict]] = []
+    current: list[dict] = []
+    current_tokens = 0
+    current_input = 0
+    for p in page_payloads:
+        estimate = _estimate_page_tokens(p)
+        input_estimate = _estimate_input_tokens(p)
+        if current and (
+            current_tokens + estimate > token_budget
+            or current_input + input_estimate > input_budget
+            or len(current) >= max_pages
+        ):
+            buckets.append(current)
+            current, current_tokens, current_input = [], 0, 0
+        current.append(p)
+        current_tokens += estimate
+        current_input += input_estimate
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def _bucket_max_tokens(bucket: list[dict]) -> int:
+    """Completion cap for one request: 2x the expected output, within OPENAI_MAX_TOKENS."""
+    return min(OPENAI_MAX_TOKENS, 400 + 2 * sum(_estimate_page_tokens(p) for p in bucket))
+
+
+def _dumps(obj) -> bytes:
+    return orjson.dumps(obj) if orjson is not None else json.dumps(obj).encode("utf-8")
+
+
+def _loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
 
-    resp = client.chat.completions.create(
-        model=model_name,
-        messages=[
-            {"role": "system", "content": _system_instructions(require_references)},
+def _response_cache_key(body: dict) -> str:
+    """Digest of the full request (model, prompts, images, limits) for the response cache."""
+    return hashlib.blake2b(_dumps(body), digest_size=16).hexdigest()
+
+
+def _gemini_cache_key(model_name: str, system_text: str, user_prompt: str, image_bytes: bytes) -> str:
+    """Digest of one Gemini page request: model, prompts and the page image."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (model_name.encode("utf-8"), system_text.encode("utf-8"), user_prompt.encode("utf-8"), image_bytes):
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+# Opt-in reuse of page reviews for near-duplicate sheets (the same unit plan
+# re-issued for another building with trivial edits). A page matches when its
+# difference hash is within NEAR_DUPLICATE_MAX_DISTANCE bits and its extracted
+# text is at least NEAR_DUPLICATE_MIN_TEXT_RATIO similar to a stored page of
+# the same type, ruleset and model.
+NEAR_DUPLICATE_HASH_SIZE = 16
+NEAR_DUPLICATE_MAX_DISTANCE = 8
+NEAR_DUPLICATE_MIN_TEXT_RATIO = 0.95
+NEAR_DUPLICATE_TEXT_CHARS = 4000
+
+
+_DHASH_CACHE: dict = {}
+
+
+def _image_dhash(png_bytes: bytes) -> str:
+    """Difference hash (NEAR_DUPLICATE_HASH_SIZE**2 bits) of a page image, as hex."""
+    return _digest_cached(_DHASH_CACHE, (_image_digest(png_bytes),), lambda: _compute_dhash(png_bytes), size=64)
+
+
+def _compute_dhash(png_bytes: bytes) -> str:
+    size = NEAR_DUPLICATE_HASH_SIZE
+    img = Image.open(io.BytesIO(png_bytes)).convert("L")
+    px = img.resize((size + 1, size), Image.BILINEAR, reducing_gap=2.0).tobytes()
+    bits = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (px[offset + col] > px[offset + col + 1])
+    return f"{bits:0{size * size // 4}x}"
+
+
+def _near_duplicate_key(p: dict) -> tuple[str, str]:
+    """(page type, normalized extracted text) used to look up near-duplicate pages."""
+    tag = _normalize_tag(p.get("tag", p.get("page_label", "Combo Sheet")))
+    text = " ".join((p.get("extra_text") or "").split()).lower()[:NEAR_DUPLICATE_TEXT_CHARS]
+    return tag, text
+
+
+def _is_near_duplicate(hash_a: int, text_a: str, hash_b: int, text_b: str) -> bool:
+    if (hash_a ^ hash_b).bit_count() > NEAR_DUPLICATE_MAX_DISTANCE:
+        return False
+    if text_a == text_b:
+        return True
+    matcher = difflib.SequenceMatcher(None, text_a, text_b, autojunk=False)
+    return (
+        matcher.quick_ratio() >= NEAR_DUPLICATE_MIN_TEXT_RATIO
+        and matcher.ratio() >= NEAR_DUPLICATE_MIN_TEXT_RATIO
+    )
+
+
+def _with_page_hints(page: dict, p: dict) -> dict:
+    """A reviewed page re-labelled with the index and sheet hints of payload p."""
+    return {
+        **page,
+        "page_index": p.get("page_index", 0),
+        "sheet_id": p.get("sheet_id_hint") or p.get("sheet_number_hint") or page.get("sheet_id", ""),
+        "sheet_title": p.get("sheet_title_hint") or page.get("sheet_title", ""),
+    }
+
+
+def _find_near_duplicate(p: dict, ruleset: str, model_name: str) -> Optional[dict]:
+    if not p.get("png_bytes"):
+        return None
+    tag, text = _near_duplicate_key(p)
+    # Reviews stored by other runs may belong to another project; a hash match
+    # alone is not enough to reuse one, so pages without text are always reviewed.
+    if not text:
+        return None
+    image_hash = int(_image_dhash(p["png_bytes"]), 16)
+    for row in find_page_reviews(ruleset, tag, model_name):
+        if _is_near_duplicate(image_hash, text, int(row["image_hash"], 16), row["page_text"]):
+            return _with_page_hints(_loads(row["page_json"]), p)
+    return None
+
+
+def _dedupe_pages(page_payloads: list[dict]) -> tuple[list[dict], list[tuple[dict, int]]]:
+    """Hold back pages that near-duplicate an earlier page of the same review.
+
+    Returns (payloads to review, [(duplicate payload, representative page_index)]).
+    Region crops (several payloads per page_index) are always reviewed.
+    """
+    per_index = Counter(p.get("page_index", 0) for p in page_payloads)
+    kept: list[dict] = []
+    duplicates: list[tuple[dict, int]] = []
+    representatives: list[tuple[int, str, str, int]] = []
+    for p in page_payloads:
+        page_index = p.get("page_index", 0)
+        if per_index[page_index] != 1 or not p.get("png_bytes"):
+            kept.append(p)
+            continue
+        tag, text = _near_duplicate_key(p)
+        image_hash = int(_image_dhash(p["png_bytes"]), 16)
+        for rep_hash, rep_tag, rep_text, rep_index in representatives:
+            if rep_tag == tag and _is_near_duplicate(image_hash, text, rep_hash, rep_text):
+                duplicates.append((p, rep_index))
+                break
+        else:
+            representatives.append((image_hash, tag, text, page_index))
+            kept.append(p)
+    return kept, duplicates
+
+
+def _clone_duplicate_pages(pages: list[dict], duplicates: list[tuple[dict, int]]) -> list[dict]:
+    """Copy each representative's reviewed page onto its held-back duplicates."""
+    by_index = {page["page_index"]: page for page in pages}
+    clones: list[dict] = []
+    for p, rep_index in duplicates:
+        page = by_index.get(rep_index)
+        if page is None:
+            continue
+        clones.append(_with_page_hints(page, p))
+    return clones
+
+
+def _split_near_duplicates(page_payloads: list[dict], ruleset: str, model_name: str) -> tuple[list[dict], list[dict]]:
+    """Split pages into (reused normalized pages, payloads still needing review)."""
+    reused: list[dict] = []
+    pending: list[dict] = []
+    for p in page_payloads:
+        page = _find_near_duplicate(p, ruleset, model_name)
+        if page is None:
+            pending.append(p)
+        else:
+            reused.append(page)
+    return reused, pending
+
+
+def _remember_page_reviews(pages: list[dict], page_payloads: list[dict], ruleset: str, model_name: str):
+    """Store reviewed pages for near-duplicate reuse (only pages that map to one payload)."""
+    by_index: dict = {}
+    for p in page_payloads:
+        by_index.setdefault(p.get("page_index", 0), []).append(p)
+    for page in pages:
+        matches = by_index.get(page["page_index"], [])
+        if len(matches) != 1 or not matches[0].get("png_bytes"):
+            continue
+        tag, text = _near_duplicate_key(matches[0])
+        if not text:
+            continue
+        save_page_review(ruleset, tag, model_name, _image_dhash(matches[0]["png_bytes"]), text, _dumps(page).decode("utf-8"))
+
+
+# Fields the app fills in after review; the model is not asked for them.
+_REVIEWER_FIELDS = frozenset(("issue_id", "reviewer_note", "effective_severity"))
+
+
+def _strict_json_schema(node, closed: bool = True):
+    """Patch a Pydantic JSON schema in place to OpenAI's strict structured-output subset.
+
+    closed=False leaves out additionalProperties, which Gemini's Schema type
+    does not accept in every SDK version.
+    """
+    if isinstance(node, dict):
+        node.pop("default", None)
+        props = node.get("properties")
+        if isinstance(props, dict):
+            for name in _REVIEWER_FIELDS.intersection(props):
+                del props[name]
+            node["required"] = list(props)
+            if closed:
+                node["additionalProperties"] = False
+        for value in node.values():
+            _strict_json_schema(value, closed)
+    elif isinstance(node, list):
+        for value in node:
+            _strict_json_schema(value, closed)
+    return node
+
+
+# Constrained decoding: responses are schema-valid JSON, so _coerce_json's
+# repair fallbacks only matter for the Gemini path; truncated output is caught
+# by finish_reason before parsing.
+_REVIEW_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "ReviewResult",
+        "strict": True,
+        "schema": _strict_json_schema(ReviewResult.model_json_schema()),
+    },
+}
+
+# Same pruning for Gemini's constrained decoding, so the model is not asked
+# for the reviewer-only fields either.
+_GEMINI_RESPONSE_SCHEMA = _strict_json_schema(ReviewResult.model_json_schema(), closed=False)
+
+
+def _openai_request_body(
+    project_name,
+    ruleset,
+    scale_note,
+    page_payloads,
+    model_name: str,
+    max_tokens: int = OPENAI_MAX_TOKENS,
+    require_references: bool = True,
+) -> dict:
+    """Chat Completions request body shared by the live and batch paths."""
+    content = _build_openai_content(project_name, ruleset, scale_note, page_payloads)
+    return {
+        "model": model_name,
+        "messages": [
+            _openai_system_message(ruleset, require_references),
             {"role": "user", "content": content}
         ],
-        response_format={"type": "json_object"},
-        temperature=0.2,
-        max_tokens=8000,
+        "response_format": _REVIEW_RESPONSE_FORMAT,
+        "temperature": 0.2,
+        "max_tokens": max_tokens,
+    }
+
+
+def _merge_page_results(results: list[dict], project_name, ruleset, scale_note) -> dict:
+    """Combine per-page normalized payloads into one review payload."""
+    merged_pages: list[dict] = []
+    page_summaries: list[str] = []
+    for normalized in results:
+        if normalized.get("pages"):
+            merged_pages.extend(normalized["pages"])
+        if normalized.get("overall_summary"):
+            page_summaries.append(normalized["overall_summary"])
+    return {
+        "project_name": project_name or "",
+        "ruleset": ruleset,
+        "scale_note": scale_note or "",
+        "overall_summary": " ".join(s for s in page_summaries if s).strip(),
+        "pages": merged_pages,
+    }
+
+
+OPENAI_MAX_CONCURRENCY = 8
+
+
+# Called with the normalized page dicts as each request finishes, so callers
+# can show progress before the whole review is done.
+PagesCallback = Callable[[list[dict]], None]
+
+
+def _add_reused_pages(
+    merged: dict,
+    reused: list[dict],
+    duplicates: list[tuple[dict, int]],
+    on_pages_reviewed: Optional[PagesCallback],
+):
+    """Fold stored and in-review duplicate pages into a merged review, in page order."""
+    clones = _clone_duplicate_pages(merged["pages"], duplicates) if duplicates else []
+    if clones and on_pages_reviewed is not None:
+        on_pages_reviewed(clones)
+    if reused or clones:
+        merged["pages"].extend(reused)
+        merged["pages"].extend(clones)
+        merged["pages"].sort(key=lambda page: page["page_index"])
+
+
+async def _openai_review_bucket(
+    client: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+    project_name: str,
+    ruleset: str,
+    scale_note: str,
+    bucket: list[dict],
+    model_name: str,
+    max_tokens: Optional[int] = None,
+    use_cache: bool = True,
+    reuse_near_duplicates: bool = False,
+    require_references: bool = True,
+    on_pages_reviewed: Optional[PagesCallback] = None,
+) -> dict:
+    body = _openai_request_body(
+        project_name,
+        ruleset,
+        scale_note,
+        bucket,
+        model_name,
+        max_tokens or _bucket_max_tokens(bucket),
+        require_references,
     )
+    page_indexes = [p.get("page_index", 0) for p in bucket]
+    while True:
+        cache_key = _response_cache_key(body) if use_cache else None
+        cached_text = get_cached_response(cache_key) if cache_key else None
+        if cached_text is not None:
+            output_text = cached_text
+            break
+        pieces: list[str] = []
+        finish_reason = None
+        async with semaphore:
+            stream = await client.chat.completions.create(**body, stream=True)
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    pieces.append(choice.delta.content)
+                finish_reason = choice.finish_reason or finish_reason
+        output_text = "".join(pieces)
+        if finish_reason != "length":
+            break
+        # A response cut off at max_tokens is never a complete review: retry
+        # once at the full cap when the cap was sized here, else give up.
+        if max_tokens is not None or body["max_tokens"] >= OPENAI_MAX_TOKENS:
+            raise ValueError(
+                f"OpenAI response for pages {page_indexes} was cut off at max_tokens={body['max_tokens']}."
+            )
+        body = {**body, "max_tokens": OPENAI_MAX_TOKENS}
 
-    output_text = _extract_output_text(resp)
     if not output_text:
-        raise ValueError("No response from OpenAI API")
+        raise ValueError(f"No response from OpenAI API for pages {page_indexes}.")
 
-    payload = _coerce_json(output_text)
-    payload = _normalize_payload(payload, project_name, ruleset, scale_note, page_payloads)
-    return ReviewResult.model_validate(payload)
+    payload, strict = _parse_json(output_text)
+    if cache_key and cached_text is None and strict:
+        save_cached_response(cache_key, output_text)
+    normalized = _normalize_payload(payload, project_name, ruleset, scale_note, bucket, require_references)
+    if reuse_near_duplicates:
+        _remember_page_reviews(normalized["pages"], bucket, ruleset, model_name)
+    if on_pages_reviewed is not None:
+        on_pages_reviewed(normalized["pages"])
+    return normalized
 
 
-def _gemini_run_review_per_page(
-    gemini_api_key: str,
+async def _openai_run_review_async(
+    openai_api_key: str,
     project_name: str,
     ruleset: str,
     scale_note: str,
     page_payloads: list[dict],
-    model_name: str = "gemini-2.0-flash-exp",
+    model_name: str = "gpt-4o",
+    max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+    max_tokens: Optional[int] = None,
+    use_cache: bool = True,
+    reuse_near_duplicates: bool = False,
+    image_max_side: int = VISION_MAX_SIDE,
+    require_references: bool = True,
+    on_pages_reviewed: Optional[PagesCallback] = None,
 ) -> ReviewResult:
     """
-    Gemini Agentic Vision approach with improved prompts
+    Review pages in concurrent Chat Completions calls.
+
+    Pages are packed into buckets whose expected output stays under 80% of
+    max_tokens, so the shared prompt is sent once per bucket instead of once
+    per page without risking a truncated JSON response. Each request's
+    max_tokens is sized to its bucket unless an explicit cap is given, and
+    identical requests are answered from the SQLite response cache when
+    use_cache is set. With reuse_near_duplicates, pages matching a stored
+    near-duplicate page review, or an earlier page of this review, skip the
+    API entirely.
     """
-    if genai is None or gemini_types is None:
-        raise RuntimeError("google-genai is not installed. Add google-genai to requirements.txt.")
+    reused: list[dict] = []
+    duplicates: list[tuple[dict, int]] = []
+    if reuse_near_duplicates:
+        reused, page_payloads = _split_near_duplicates(page_payloads, ruleset, model_name)
+        page_payloads, duplicates = _dedupe_pages(page_payloads)
+        if reused and on_pages_reviewed is not None:
+            on_pages_reviewed(reused)
+    buckets = _bucket_pages(_with_data_urls(page_payloads, image_max_side), int(OPENAI_MAX_TOKENS * 0.8))
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async with AsyncOpenAI(api_key=openai_api_key, http_client=_OrjsonAsyncHttpxClient()) as client:
+        results = await asyncio.gather(
+            *(
+                _openai_review_bucket(
+                    client,
+                    semaphore,
+                    project_name,
+                    ruleset,
+                    scale_note,
+                    bucket,
+                    model_name,
+                    max_tokens=max_tokens,
+                    use_cache=use_cache,
+                    reuse_near_duplicates=reuse_near_duplicates,
+                    require_references=require_references,
+                    on_pages_reviewed=on_pages_reviewed,
+                )
+                for bucket in buckets
+            )
+        )
 
-    client = genai.Client(api_key=gemini_api_key)
+    merged = _merge_page_results(results, project_name, ruleset, scale_note)
+    _add_reused_pages(merged, reused, duplicates, on_pages_reviewed)
+    # Plain dicts + model_validate on purpose: pydantic-core validates the whole
+    # tree faster than per-issue model_construct calls from Python.
+    return ReviewResult.model_validate(merged)
 
-    merged_pages: list[dict] = []
-    page_summaries: list[str] = []
 
-    for p in page_payloads:
-        page_index = p.get("page_index", 0)
-        page_label = p.get("page_label", "Combo Sheet")
-        region_tag = p.get("tag", page_label)
-        tag_label = _normalize_tag(region_tag)
-        enhanced_prompt = build_enhanced_prompt(tag_label, ruleset)
+def _openai_run_review(
+    openai_api_key: str,
+    project_name: str,
+    ruleset: str,
+    scale_note: str,
+    page_payloads: list[dict],
+    model_name: str = "gpt-4o",
+    max_tokens: Optional[int] = None,
+    use_cache: bool = True,
+    reuse_near_duplicates: bool = False,
+    image_max_side: int = VISION_MAX_SIDE,
+    require_references: bool = True,
+    on_pages_reviewed: Optional[PagesCallback] = None,
+) -> ReviewResult:
+    return asyncio.run(
+        _openai_run_review_async(
+            openai_api_key=openai_api_key,
+            project_name=project_name,
+            ruleset=ruleset,
+            scale_note=scale_note,
+            page_payloads=page_payloads,
+            model_name=model_name,
+            max_tokens=max_tokens,
+            use_cache=use_cache,
+            reuse_near_duplicates=reuse_near_duplicates,
+            image_max_side=image_max_side,
+            require_references=require_references,
+            on_pages_reviewed=on_pages_reviewed,
+        )
+    )
+
+
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def run_review_batch(
+    api_key: str,
+    jobs: list[dict],
+    model_name: str = "gpt-4o",
+    poll_interval: float = 60.0,
+) -> tuple[Dict[str, ReviewResult], Dict[str, str]]:
+    """
+    Run many reviews through the OpenAI Batch API (50% cost, up to 24h turnaround).
+
+    Intended for offline/bulk runs; interactive use should stay on run_review.
+
+    Args:
+        api_key: OpenAI API key
+        jobs: List of dicts with project_name, ruleset, scale_note, page_payloads
+            and optional unique custom_id and require_references (default True)
+        model_name: OpenAI model
+        poll_interval: Seconds between batch status checks
+
+    Returns:
+        (results, errors) keyed by custom_id
+    """
+    client = _get_openai_client(api_key)
+
+    jobs_by_id: Dict[str, dict] = {}
+    lines = []
+    for idx, job in enumerate(jobs):
+        custom_id = job.get("custom_id") or f"{job.get('project_name') or 'review'}_{idx}"
+        if custom_id in jobs_by_id:
+            raise ValueError(f"Duplicate batch custom_id: {custom_id}")
+        jobs_by_id[custom_id] = job
+        body = _openai_request_body(
+            job.get("project_name", ""),
+            job["ruleset"],
+            job.get("scale_note", ""),
+            _with_data_urls(job["page_payloads"]),
+            model_name,
+            require_references=job.get("require_references", True),
+        )
+        line = {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+        lines.append(_dumps(line))
+
+    batch_file = client.files.create(file=("reviews.jsonl", b"\n".join(lines)), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    while batch.status not in BATCH_TERMINAL_STATUSES:
+        time.sleep(poll_interval)
+        batch = client.batches.retrieve(batch.id)
 
-        user_prompt = f"""Project: {project_name}
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"OpenAI batch {batch.id} ended with status '{batch.status}'.")
+
+    results: Dict[str, ReviewResult] = {}
+    errors: Dict[str, str] = {}
+    for raw_line in client.files.content(batch.output_file_id).text.splitlines():
+        if not raw_line.strip():
+            continue
+        record = _loads(raw_line)
+        custom_id = record.get("custom_id")
+        job = jobs_by_id.get(custom_id)
+        if job is None:
+            continue
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            errors[custom_id] = str(record.get("error") or response.get("body"))
+            continue
+        try:
+            choice = response["body"]["choices"][0]
+            if choice.get("finish_reason") == "length":
+                errors[custom_id] = "Response was cut off at max_tokens."
+                continue
+            output_text = choice["message"]["content"]
+            payload = _coerce_json(output_text)
+            payload = _normalize_payload(
+                payload,
+                job.get("project_name", ""),
+                job["ruleset"],
+                job.get("scale_note", ""),
+                job["page_payloads"],
+                job.get("require_references", True),
+            )
+            results[custom_id] = ReviewResult.model_validate(payload)
+        except (KeyError, IndexError, TypeError, ValueError) as exc:
+            errors[custom_id] = str(exc)
+
+    for custom_id in jobs_by_id:
+        if custom_id not in results and custom_id not in errors:
+            errors[custom_id] = "No result returned by batch."
+    return results, errors
+
+
+GEMINI_MAX_CONCURRENCY = 8
+GEMINI_MAX_RETRIES = 3
+_GEMINI_RETRYABLE_CODES = frozenset((429, 500, 502, 503, 504))
+
+
+async def _gemini_generate_text(client, semaphore: asyncio.Semaphore, **kwargs) -> str:
+    """Stream generate_content under the concurrency limit and join the text chunks.
+
+    Rate limits and 5xx are retried with exponential backoff; a retry restarts
+    the stream from scratch. A response cut off at the output token limit
+    raises ValueError rather than returning partial JSON.
+    """
+    async with semaphore:
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            pieces: list[str] = []
+            finish_reason = None
+            try:
+                async for chunk in await client.aio.models.generate_content_stream(**kwargs):
+                    if chunk.text:
+                        pieces.append(chunk.text)
+                    if chunk.candidates and chunk.candidates[0].finish_reason:
+                        finish_reason = chunk.candidates[0].finish_reason
+                if finish_reason == gemini_types.FinishReason.MAX_TOKENS:
+                    raise ValueError("Gemini response was cut off at the output token limit.")
+                return "".join(pieces)
+            except gemini_errors.APIError as exc:
+                if attempt == GEMINI_MAX_RETRIES or exc.code not in _GEMINI_RETRYABLE_CODES:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+
+def _gemini_config(strict_json: bool):
+    # Gemini rejects a JSON response MIME type together with tools, so strict
+    # mode trades code execution (agentic zoom/crop) for constrained decoding.
+    if strict_json:
+        return gemini_types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=_GEMINI_RESPONSE_SCHEMA,
+            temperature=0.2,
+        )
+    return gemini_types.GenerateContentConfig(
+        tools=[gemini_types.Tool(code_execution=gemini_types.ToolCodeExecution)],
+        temperature=0.2,
+    )
+
+
+async def _gemini_review_page(
+    client,
+    semaphore: asyncio.Semaphore,
+    p: dict,
+    project_name: str,
+    ruleset: str,
+    scale_note: str,
+    model_name: str,
+    use_cache: bool = True,
+    reuse_near_duplicates: bool = False,
+    image_max_side: int = GEMINI_IMAGE_MAX_SIDE,
+    require_references: bool = True,
+    strict_json: bool = False,
+    on_pages_reviewed: Optional[PagesCallback] = None,
+) -> dict:
+    if reuse_near_duplicates:
+        reused_page = _find_near_duplicate(p, ruleset, model_name)
+        if reused_page is not None:
+            if on_pages_reviewed is not None:
+                on_pages_reviewed([reused_page])
+            return {"pages": [reused_page]}
+
+    page_index = p.get("page_index", 0)
+    page_label = p.get("page_label", "Combo Sheet")
+    region_tag = p.get("tag", page_label)
+    tag_label = _normalize_tag(region_tag)
+    page_tail = build_page_tail(tag_label)
+    extra_text = _clip_extra_text(p)
+    extra_text_block = f"Extracted text from this page:\n{extra_text}" if extra_text else ""
+
+    user_prompt = f"""Project: {project_name}
 Ruleset: {ruleset}
 Scale: {p.get('scale_note', scale_note)}
 
@@ -611,9 +1479,9 @@ Scale: {p.get('scale_note', scale_note)}
 REGION TAG: {region_tag}
 {f"Anchor: {p.get('anchor_text')}" if p.get("anchor_text") else ""}
 
-{enhanced_prompt}
+{page_tail}
 
-{("Extracted text from this page:\n" + p["extra_text"][:8000]) if p.get("extra_text") else ""}
+{extra_text_block}
 
 CRITICAL QUALITY TARGETS:
 - Code references: 100% (every issue must have specific section number)
@@ -624,9 +1492,16 @@ CRITICAL QUALITY TARGETS:
 Return STRICT JSON matching the schema.
 """
 
-        system_text = SYSTEM_INSTRUCTIONS.strip() + "\n\n" + AGENTIC_VISION_ADDENDUM.strip()
-
-        resp = client.models.generate_content(
+    system_text = _gemini_system_text(ruleset, require_references, code_execution=not strict_json)
+    image_bytes = _fit_to_vision_grid(p["png_bytes"], image_max_side, None)
+    cache_key = _gemini_cache_key(model_name, system_text, user_prompt, image_bytes) if use_cache else None
+    cached_text = get_cached_response(cache_key) if cache_key else None
+    if cached_text is not None:
+        out_text = cached_text
+    else:
+        out_text = await _gemini_generate_text(
+            client,
+            semaphore,
             model=model_name,
             contents=[
                 gemini_types.Content(
@@ -634,40 +1509,121 @@ Return STRICT JSON matching the schema.
                     parts=[
                         gemini_types.Part.from_text(system_text),
                         gemini_types.Part.from_text(user_prompt),
-                        gemini_types.Part.from_bytes(data=p["png_bytes"], mime_type="image/png"),
+                        gemini_types.Part.from_bytes(data=image_bytes, mime_type=_image_mime(image_bytes)),
                     ],
                 )
             ],
-            config=gemini_types.GenerateContentConfig(
-                tools=[gemini_types.Tool(code_execution=gemini_types.ToolCodeExecution)],
-                temperature=0.2,
-            ),
+            config=_gemini_config(strict_json),
         )
 
-        out_text = getattr(resp, "text", None)
-        if not out_text:
-            raise ValueError(f"Gemini returned empty text for page {page_index}.")
+    if not out_text:
+        raise ValueError(f"Gemini returned empty text for page {page_index}.")
 
-        page_payload = _coerce_json(out_text)
-        normalized = _normalize_payload(page_payload, project_name, ruleset, scale_note, [p])
+    page_payload, strict = _parse_json(out_text)
+    if cache_key and cached_text is None and strict:
+        save_cached_response(cache_key, out_text)
+    normalized = _normalize_payload(page_payload, project_name, ruleset, scale_note, [p], require_references)
+    if reuse_near_duplicates:
+        _remember_page_reviews(normalized["pages"], [p], ruleset, model_name)
+    if on_pages_reviewed is not None:
+        on_pages_reviewed(normalized["pages"])
+    return normalized
 
-        if normalized.get("pages"):
-            merged_pages.extend(normalized["pages"])
-        if normalized.get("overall_summary"):
-            page_summaries.append(normalized["overall_summary"])
 
-    merged = {
-        "project_name": project_name or "",
-        "ruleset": ruleset,
-        "scale_note": scale_note or "",
-        "overall_summary": " ".join(s for s in page_summaries if s).strip(),
-        "pages": merged_pages,
-    }
+async def _gemini_run_review_async(
+    gemini_api_key: str,
+    project_name: str,
+    ruleset: str,
+    scale_note: str,
+    page_payloads: list[dict],
+    model_name: str = "gemini-2.0-flash-exp",
+    max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+    use_cache: bool = True,
+    reuse_near_duplicates: bool = False,
+    image_max_side: int = GEMINI_IMAGE_MAX_SIDE,
+    require_references: bool = True,
+    strict_json: bool = False,
+    on_pages_reviewed: Optional[PagesCallback] = None,
+) -> ReviewResult:
+    """
+    Gemini Agentic Vision approach with improved prompts
 
-    merged = _normalize_payload(merged, project_name, ruleset, scale_note, page_payloads)
+    Pages are independent requests, so they run concurrently (up to
+    max_concurrency) and are merged back in page order. Pages whose model,
+    prompts and image match a stored response are answered from the SQLite
+    response cache when use_cache is set; with reuse_near_duplicates,
+    near-duplicate pages reuse a stored page review or an earlier page of
+    this review. strict_json requests schema-constrained JSON instead of
+    enabling code execution.
+    """
+    if genai is None or gemini_types is None:
+        raise RuntimeError("google-genai is not installed. Add google-genai to requirements.txt.")
+
+    duplicates: list[tuple[dict, int]] = []
+    if reuse_near_duplicates:
+        page_payloads, duplicates = _dedupe_pages(page_payloads)
+
+    client = genai.Client(api_key=gemini_api_key)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = await asyncio.gather(
+        *(
+            _gemini_review_page(
+                client,
+                semaphore,
+                p,
+                project_name,
+                ruleset,
+                scale_note,
+                model_name,
+                use_cache=use_cache,
+                reuse_near_duplicates=reuse_near_duplicates,
+                image_max_side=image_max_side,
+                require_references=require_references,
+                strict_json=strict_json,
+                on_pages_reviewed=on_pages_reviewed,
+            )
+            for p in page_payloads
+        )
+    )
+
+    # Each page was normalized as it came back; the merge only concatenates.
+    merged = _merge_page_results(results, project_name, ruleset, scale_note)
+    _add_reused_pages(merged, [], duplicates, on_pages_reviewed)
     return ReviewResult.model_validate(merged)
 
 
+def _gemini_run_review_per_page(
+    gemini_api_key: str,
+    project_name: str,
+    ruleset: str,
+    scale_note: str,
+    page_payloads: list[dict],
+    model_name: str = "gemini-2.0-flash-exp",
+    use_cache: bool = True,
+    reuse_near_duplicates: bool = False,
+    image_max_side: int = GEMINI_IMAGE_MAX_SIDE,
+    require_references: bool = True,
+    strict_json: bool = False,
+    on_pages_reviewed: Optional[PagesCallback] = None,
+) -> ReviewResult:
+    return asyncio.run(
+        _gemini_run_review_async(
+            gemini_api_key=gemini_api_key,
+            project_name=project_name,
+            ruleset=ruleset,
+            scale_note=scale_note,
+            page_payloads=page_payloads,
+            model_name=model_name,
+            use_cache=use_cache,
+            reuse_near_duplicates=reuse_near_duplicates,
+            image_max_side=image_max_side,
+            require_references=require_references,
+            strict_json=strict_json,
+            on_pages_reviewed=on_pages_reviewed,
+        )
+    )
+
+
 def run_review(
     api_key: str,
     project_name: str,
@@ -678,6 +1634,13 @@ def run_review(
     provider: str = "openai",
     gemini_api_key: Optional[str] = None,
     gemini_model: str = "gemini-2.0-flash-exp",
+    max_tokens: Optional[int] = None,
+    use_cache: bool = True,
+    reuse_near_duplicates: bool = False,
+    image_max_side: Optional[int] = None,
+    require_references: bool = True,
+    gemini_strict_json: bool = False,
+    on_pages_reviewed: Optional[PagesCallback] = None,
 ) -> ReviewResult:
     """
     Run accessibility review with improved quality prompts
@@ -687,11 +1650,26 @@ def run_review(
         project_name: Name of project
         ruleset: FHA, ANSI_A1171_TYPE_A, or ANSI_A1171_TYPE_B
         scale_note: Drawing scale
-        page_payloads: List of page data with images
+        page_payloads: List of page data with images (png_bytes, or an
+            already-hosted image_url for the OpenAI provider)
         model_name: OpenAI model (default: gpt-4o for better quality)
         provider: 'openai' or 'gemini'
         gemini_api_key: Gemini API key if using Gemini
         gemini_model: Gemini model (default: gemini-2.0-flash-exp)
+        max_tokens: Optional OpenAI completion cap per request (default: sized
+            to the pages in each request)
+        use_cache: Reuse stored responses for identical requests (both providers)
+        reuse_near_duplicates: Reuse stored page reviews for near-duplicate
+            sheets (similar image hash and extracted text); off by default
+        image_max_side: Longest image side sent to the model (default: 2048
+            for OpenAI, 3072 for Gemini); larger renders are downscaled
+        require_references: Require a code section on every issue (missing
+            ones become "Reference needed"); when False the model may leave
+            reference empty
+        gemini_strict_json: Ask Gemini for schema-constrained JSON; this
+            disables its code execution tool
+        on_pages_reviewed: Optional callback receiving normalized page dicts
+            as each request completes
 
     Returns:
         ReviewResult with improved quality metrics
@@ -708,6 +1686,12 @@ def run_review(
             scale_note=scale_note,
             page_payloads=page_payloads,
             model_name=gemini_model,
+            use_cache=use_cache,
+            reuse_near_duplicates=reuse_near_duplicates,
+            image_max_side=image_max_side or GEMINI_IMAGE_MAX_SIDE,
+            require_references=require_references,
+            strict_json=gemini_strict_json,
+            on_pages_reviewed=on_pages_reviewed,
         )
 
     return _openai_run_review(
@@ -717,4 +1701,10 @@ def run_review(
         scale_note=scale_note,
         page_payloads=page_payloads,
         model_name=model_name,
+        max_tokens=max_tokens,
+        use_cache=use_cache,
+        reuse_near_duplicates=reuse_near_duplicates,
+        image_max_side=image_max_side or VISION_MAX_SIDE,
+        require_references=require_references,
+        on_pages_reviewed=on_pages_reviewed,
     )
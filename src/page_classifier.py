@@ -1,6 +1,11 @@
+import importlib.util
 import re
 from typing import Dict, List
 
+ahocorasick = None
+if importlib.util.find_spec("ahocorasick") is not None:
+    import ahocorasick
+
 TAGS = [
     "Floor Plan",
     "Interior Elevations",
@@ -36,6 +41,9 @@ KEYWORDS = {
     "Details / Sections": ["DETAIL", "SECTION", "CALLOUT", "TYP.", "ENLARGED"],
 }
 
+# Sheets that are mostly tables and text; they can be rasterized in grayscale.
+TEXT_ONLY_TAGS = frozenset({"Door Schedule", "Notes / Code"})
+
 CONFIDENCE_THRESHOLDS = [
     (8, "High"),
     (4, "Medium"),
@@ -43,39 +51,73 @@ CONFIDENCE_THRESHOLDS = [
 ]
 
 
-def _score_for_keyword(text: str, keyword: str) -> int:
-    if " " in keyword:
-        return 3 if keyword in text else 0
-    if len(keyword) == 1:
-        return 1 if re.search(rf"\\b{re.escape(keyword)}\\b", text) else 0
-    return 1 if keyword in text else 0
+# Keyword tables are split by match rule and built once at import: multi-word
+# phrases score 3, single words 1. Single-letter keywords are left out: their
+# original pattern, rf"\\b{kw}\\b", looks for a literal backslash-b that the
+# upper-cased page text never contains, so they have never scored. Making them
+# whole-word matches would change auto-tags and needs its own change.
+_MULTIWORD_KWS = {tag: tuple(kw for kw in kws if " " in kw) for tag, kws in KEYWORDS.items()}
+_WORD_KWS = {tag: tuple(kw for kw in kws if " " not in kw and len(kw) > 1) for tag, kws in KEYWORDS.items()}
+
+# With pyahocorasick installed, all multi-letter keywords are found in one pass
+# over the page text. A keyword still scores once per page however often it
+# appears, so results match the substring loops used without it.
+_KEYWORD_AUTOMATON = None
+if ahocorasick is not None:
+    _weights: Dict[str, List] = {}
+    for _tag in KEYWORDS:
+        for _kw in _MULTIWORD_KWS[_tag] + _WORD_KWS[_tag]:
+            _weights.setdefault(_kw, []).append((_tag, 3 if " " in _kw else 1))
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _kw, _entries in _weights.items():
+        _KEYWORD_AUTOMATON.add_word(_kw, (_kw, tuple(_entries)))
+    _KEYWORD_AUTOMATON.make_automaton()
+    del _weights, _tag, _kw, _entries
+
+_SPACED_COLUMNS_RE = re.compile(r"\S\s{2,}\S")
+_TABLE_HEADER_TOKENS = ("WIDTH", "HEIGHT", "TYPE", "MARK")
 
 
 def _table_bonus(text: str) -> int:
     lines = [line.strip() for line in text.splitlines() if line.strip()]
     if not lines:
         return 0
-    spaced_lines = sum(1 for line in lines if re.search(r"\S+\s{2,}\S+", line))
-    header_hits = sum(1 for token in ["WIDTH", "HEIGHT", "TYPE", "MARK"] if token in text)
+    spaced_lines = sum(1 for line in lines if _SPACED_COLUMNS_RE.search(line))
+    header_hits = sum(1 for token in _TABLE_HEADER_TOKENS if token in text)
     if spaced_lines >= max(3, len(lines) // 10) or header_hits >= 2:
         return 5
     return 0
 
 
-def _confidence_for_score(score: int) -> str:
+def _label_for_score(score: int) -> str:
     for threshold, label in CONFIDENCE_THRESHOLDS:
         if score >= threshold:
             return label
     return "Low"
 
 
+# A tag's score (its keywords plus the table bonus) is a small non-negative int
+# well under 64, so labels are looked up rather than recomputed per tag.
+_CONFIDENCE_LUT = tuple(_label_for_score(score) for score in range(64))
+
+
+def _confidence_for_score(score: int) -> str:
+    return _CONFIDENCE_LUT[min(max(score, 0), len(_CONFIDENCE_LUT) - 1)]
+
+
 def classify_page(text: str) -> Dict:
     combined = (text or "").upper()
     scores: Dict[str, int] = {tag: 0 for tag in TAGS}
 
-    for tag, keywords in KEYWORDS.items():
-        for keyword in keywords:
-            scores[tag] += _score_for_keyword(combined, keyword)
+    if _KEYWORD_AUTOMATON is not None:
+        hits = dict(value for _, value in _KEYWORD_AUTOMATON.iter(combined))
+        for entries in hits.values():
+            for tag, weight in entries:
+                scores[tag] += weight
+    else:
+        for tag in KEYWORDS:
+            scores[tag] += 3 * sum(1 for kw in _MULTIWORD_KWS[tag] if kw in combined)
+            scores[tag] += sum(1 for kw in _WORD_KWS[tag] if kw in combined)
 
     scores["Door Schedule"] += _table_bonus(combined)
 
@@ -101,3 +143,9 @@ def classify_page(text: str) -> Dict:
 
     tagged.sort(key=lambda item: item["score"], reverse=True)
     return {"tags": tagged, "raw_scores": scores}
+
+
+def is_text_only(classification: Dict) -> bool:
+    """True when every tag classify_page assigned is a text-only sheet type"""
+    tags = classification.get("tags") or []
+    return bool(tags) and all(entry["tag"] in TEXT_ONLY_TAGS and entry["score"] > 0 for entry in tags)
@@ -1,11 +1,67 @@
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from itertools import repeat
+from types import MappingProxyType
+from typing import Callable, Collection, List, Literal, Dict, Optional, Tuple, Union
 import fitz
-from PIL import Image, ImageStat, ImageOps, ImageEnhance
+from PIL import Image, ImageStat, ImageFilter
+import hashlib
 import io
+import multiprocessing
+import os
 import re
+import threading
 import gc
 
+# Documents with at least this many pages are rasterized in a process pool;
+# below it the cost of starting workers outweighs the rendering time saved.
+PARALLEL_RENDER_MIN_PAGES = 5
+
+# Upper bound for raw raster memory: a single page on its own, and the pool
+# workers together (each holds a copy of the PDF and a full-DPI page).
+RENDER_MEMORY_BUDGET_MB = 1000
+# Hard cap on render workers regardless of cores and memory.
+RENDER_MAX_WORKERS = 4
+
+# Page image caches are keyed by a digest of the image, not the bytes, so the
+# long-lived server process does not keep page PNGs alive across runs.
+IMAGE_CACHE_SIZE = 16
+_IMAGE_CACHE_LOCK = threading.Lock()
+
+# Helpers take either raw PDF bytes or a document already opened by PdfSession.
+PdfSource = Union[bytes, fitz.Document]
+
+
+class PdfSession:
+    """Open a PDF once and share the document across the extract_* helpers.
+
+    Usable as a context manager or held open and closed explicitly.
+    """
+
+    def __init__(self, pdf_bytes: bytes):
+        try:
+            self.doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        except fitz.FileDataError as e:
+            raise ValueError(f"Invalid PDF file: {str(e)}")
+
+    def close(self) -> None:
+        if not self.doc.is_closed:
+            self.doc.close()
+
+    def __enter__(self) -> fitz.Document:
+        return self.doc
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _open_pdf(pdf: PdfSource) -> Tuple[fitz.Document, bool]:
+    """Return the document and whether the caller owns (and must close) it"""
+    if isinstance(pdf, fitz.Document):
+        return pdf, False
+    return fitz.open(stream=pdf, filetype="pdf"), True
+
+
 @dataclass
 class PageImage:
     page_index: int
@@ -14,31 +70,171 @@ class PageImage:
     width: int
     height: int
     dpi: int
+    mode: str = "RGB"
+
+
+# Page renders are decoded for the quality report and resized before upload, so
+# a fast zlib level beats optimize=True (~4x slower for ~40% smaller files).
+PAGE_PNG_COMPRESS_LEVEL = 1
 
 
-def _to_png_bytes(img: Image.Image, dpi: int, optimize_memory: bool = True) -> bytes:
-    """Convert PIL Image to PNG bytes with optional compression"""
+def _to_png_bytes(img: Image.Image, dpi: int, optimize_memory: bool = False) -> bytes:
+    """Convert PIL Image to PNG bytes, fast by default or smallest with optimize_memory"""
     buf = io.BytesIO()
     if optimize_memory:
-        img.save(buf, format="PNG", optimize=True, compress_level=6, dpi=(dpi, dpi))
-    else:
         img.save(buf, format="PNG", optimize=True, dpi=(dpi, dpi))
+    else:
+        img.save(buf, format="PNG", compress_level=PAGE_PNG_COMPRESS_LEVEL, dpi=(dpi, dpi))
     return buf.getvalue()
 
 
+PLAN_AUTOCONTRAST_CUTOFF = 1
+PLAN_SHARPNESS = 1.35
+PLAN_CONTRAST = 1.15
+
+# ImageEnhance.Sharpness(f) blends the image with ImageFilter.SMOOTH, which is
+# the same as one convolution with f * identity - (f - 1) * SMOOTH.
+_SMOOTH_WEIGHTS = (1, 1, 1, 1, 5, 1, 1, 1, 1)
+_PLAN_SHARPEN = ImageFilter.Kernel(
+    (3, 3),
+    [(13 if i == 4 else 0) * PLAN_SHARPNESS - (PLAN_SHARPNESS - 1) * w for i, w in enumerate(_SMOOTH_WEIGHTS)],
+    scale=13,
+)
+_LUMA_WEIGHTS = (0.299, 0.587, 0.114)
+
+
+def _autocontrast_lut(hist: List[int], cutoff: float) -> List[int]:
+    """Per-band lookup table matching ImageOps.autocontrast(cutoff=...)"""
+    h = list(hist)
+    n = sum(h)
+    cut = int(n * cutoff // 100)
+    for lo in range(256):
+        if cut > h[lo]:
+            cut -= h[lo]
+            h[lo] = 0
+        else:
+            h[lo] -= cut
+            break
+    cut = int(n * cutoff // 100)
+    for hi in range(255, -1, -1):
+        if cut > h[hi]:
+            cut -= h[hi]
+            h[hi] = 0
+        else:
+            h[hi] -= cut
+            break
+    lo = next((ix for ix in range(256) if h[ix]), 0)
+    hi = next((ix for ix in range(255, -1, -1) if h[ix]), 255)
+    if hi <= lo:
+        return list(range(256))
+    scale = 255.0 / (hi - lo)
+    return [min(255, max(0, int(ix * scale - lo * scale))) for ix in range(256)]
+
+
 def _enhance_for_plans(img: Image.Image) -> Image.Image:
-    """Conservative enhancements with memory management"""
-    x = ImageOps.autocontrast(img, cutoff=1)
-    x = ImageEnhance.Sharpness(x).enhance(1.35)
-    x = ImageEnhance.Contrast(x).enhance(1.15)
-    return x
+    """Autocontrast, contrast and sharpen in two passes over the pixels.
+
+    Autocontrast and contrast are both per-band tone curves, so they fold into
+    one lookup table built from a single histogram (the contrast midpoint is the
+    luma mean of the autocontrasted histogram). Sharpening is one 3x3 kernel.
+    """
+    histogram = img.histogram()
+    bands = len(histogram) // 256
+    lut: List[int] = []
+    band_means = []
+    for band in range(bands):
+        hist = histogram[band * 256:(band + 1) * 256]
+        band_lut = _autocontrast_lut(hist, PLAN_AUTOCONTRAST_CUTOFF)
+        band_means.append(sum(count * band_lut[ix] for ix, count in enumerate(hist)) / max(1, sum(hist)))
+        lut.extend(band_lut)
+    weights = _LUMA_WEIGHTS if bands == 3 else (1.0,) + (0.0,) * (bands - 1)
+    mean = int(sum(w * m for w, m in zip(weights, band_means)) + 0.5)
+    lut = [min(255, max(0, int(mean + PLAN_CONTRAST * (v - mean)))) for v in lut]
+    return img.point(lut).filter(_PLAN_SHARPEN)
+
+
+PageVersions = Literal["both", "base", "enhanced", "best"]
+
+
+def _render_page(
+    doc: fitz.Document, i: int, dpi: int, want: PageVersions = "both", grayscale: bool = False
+) -> PageImage:
+    """Rasterize one page into base and enhanced PNGs (single-channel if grayscale)"""
+    zoom = dpi / 72.0
+    mat = fitz.Matrix(zoom, zoom)
+    try:
+        page = doc.load_page(i)
+        colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+        pix = page.get_pixmap(matrix=mat, alpha=False, colorspace=colorspace)
+        pix_width = pix.width
+        pix_height = pix.height
+
+        mode = "L" if grayscale else "RGB"
+        # samples_mv is a view of MuPDF's buffer; pix.samples would first copy
+        # the whole raster into a bytes object only for PIL to copy it again.
+        base_img = Image.frombytes(mode, [pix_width, pix_height], pix.samples_mv)
+
+        del pix
+        gc.collect()
+
+        if want == "base":
+            base_png = enhanced_png = _to_png_bytes(base_img, dpi=dpi)
+        else:
+            enhanced_img = _enhance_for_plans(base_img)
+            if want == "both":
+                base_png = _to_png_bytes(base_img, dpi=dpi)
+                enhanced_png = _to_png_bytes(enhanced_img, dpi=dpi)
+            else:
+                # Only one version is kept, so only one is encoded. "best" picks
+                # it the way choose_best_for_vision would, from the raw images.
+                winner = enhanced_img
+                if want == "best":
+                    base_sharpness = round(ImageQualityChecker.sharpness(base_img), 1)
+                    if round(ImageQualityChecker.sharpness(enhanced_img), 1) <= base_sharpness:
+                        winner = base_img
+                base_png = enhanced_png = _to_png_bytes(winner, dpi=dpi)
+                del winner
+            del enhanced_img
+
+        del base_img
+        gc.collect()
+
+        return PageImage(
+            page_index=i,
+            png_bytes=base_png,
+            enhanced_png_bytes=enhanced_png,
+            width=pix_width,
+            height=pix_height,
+            dpi=dpi,
+            mode=mode,
+        )
+
+    except MemoryError:
+        raise MemoryError(f"Out of memory processing page {i}. Lower DPI or process fewer pages.")
+    except Exception as page_error:
+        raise RuntimeError(f"Error processing page {i}: {str(page_error)}")
+
+
+# fitz.Document is not picklable, so each pool worker opens its own copy once.
+_WORKER_DOC: Optional[fitz.Document] = None
+
+
+def _init_render_worker(pdf_bytes: bytes) -> None:
+    global _WORKER_DOC
+    _WORKER_DOC = fitz.open(stream=pdf_bytes, filetype="pdf")
+
+
+def _render_one(i: int, dpi: int, want: PageVersions, grayscale: bool) -> PageImage:
+    return _render_page(_WORKER_DOC, i, dpi, want, grayscale)
 
 
 def pdf_to_page_images(
-    pdf_bytes: bytes,
+    pdf: PdfSource,
     dpi: int = 300,
     max_pages: Optional[int] = None,
     skip_enhancement: bool = False,
+    grayscale_pages: Optional[Collection[int]] = None,
+    want: PageVersions = "both",
 ) -> List[PageImage]:
     """
     Convert PDF pages to images with MEMORY-SAFE processing.
@@ -48,84 +244,72 @@ def pdf_to_page_images(
     - 600 DPI: ~98MB per page × 2 versions = 196MB/page
 
     Args:
-        pdf_bytes: PDF file content
+        pdf: PDF file content or an open document
         dpi: Resolution (KEEP AT 300 OR LOWER to avoid OOM)
         max_pages: Max pages to process
         skip_enhancement: Skip creating enhanced version to save 50% memory
+        grayscale_pages: Page indices to render single-channel (text-only
+            sheets such as schedules and notes); a third of the RGB memory
+        want: Which versions to encode. "both" (default) keeps base and
+            enhanced; "base", "enhanced" or "best" encode a single PNG and
+            store it in both fields ("best" keeps the sharper version)
 
     Returns:
         List of PageImage objects
     """
-    doc = None
+    doc, owned = None, False
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        doc, owned = _open_pdf(pdf)
 
         if len(doc) == 0:
             raise ValueError("PDF has no pages")
 
-        out: List[PageImage] = []
-        zoom = dpi / 72.0
-        mat = fitz.Matrix(zoom, zoom)
-
+        if skip_enhancement:
+            want = "base"
         page_count = len(doc) if max_pages is None else min(len(doc), max_pages)
+        grayscale = [i in (grayscale_pages or ()) for i in range(page_count)]
+
+        # Raw raster size of the largest page: width x height in pixels, one
+        # byte per channel, times the versions held while it is processed.
+        versions = 2 if want == "both" else 1
+        page_mb = max(
+            (rect.width * dpi / 72) * (rect.height * dpi / 72) * (1 if grayscale[i] else 3) * versions / 1024 / 1024
+            for i, rect in ((i, doc.load_page(i).rect) for i in range(page_count))
+        )
 
-        estimated_mb_per_page = (dpi / 72) * (dpi / 72) * 11 * 8.5 * 3 / 1024 / 1024
-        total_estimated_mb = estimated_mb_per_page * page_count * (1 if skip_enhancement else 2)
-
-        if total_estimated_mb > 1000:
+        if page_mb > RENDER_MEMORY_BUDGET_MB:
             raise MemoryError(
-                f"Processing {page_count} pages at {dpi} DPI would use ~{total_estimated_mb:.0f}MB. "
-                "Please lower DPI to 200-300 or process fewer pages."
+                f"Rendering one page at {dpi} DPI would use ~{page_mb:.0f}MB. "
+                "Please lower DPI to 200-300."
             )
 
-        for i in range(page_count):
-            try:
-                page = doc.load_page(i)
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                pix_width = pix.width
-                pix_height = pix.height
-
-                base_img = Image.frombytes("RGB", [pix_width, pix_height], pix.samples)
-
-                del pix
-                gc.collect()
-
-                if skip_enhancement:
-                    enhanced_img = base_img
-                else:
-                    enhanced_img = _enhance_for_plans(base_img)
-
-                base_png = _to_png_bytes(base_img, dpi=dpi, optimize_memory=True)
-
-                if skip_enhancement:
-                    enhanced_png = base_png
-                else:
-                    enhanced_png = _to_png_bytes(enhanced_img, dpi=dpi, optimize_memory=True)
-
-                del base_img
-                if not skip_enhancement:
-                    del enhanced_img
-                gc.collect()
-
-                out.append(
-                    PageImage(
-                        page_index=i,
-                        png_bytes=base_png,
-                        enhanced_png_bytes=enhanced_png,
-                        width=pix_width,
-                        height=pix_height,
-                        dpi=dpi,
-                    )
-                )
-
-            except MemoryError:
-                raise MemoryError(f"Out of memory processing page {i}. Lower DPI or process fewer pages.")
-            except Exception as page_error:
-                raise RuntimeError(f"Error processing page {i}: {str(page_error)}")
+        if page_count < PARALLEL_RENDER_MIN_PAGES or (os.cpu_count() or 1) < 2:
+            return [_render_page(doc, i, dpi, want, grayscale[i]) for i in range(page_count)]
 
-        return out
+        pdf_bytes = pdf if owned else (getattr(doc, "stream", None) or doc.tobytes())
+        worker_mb = page_mb + len(pdf_bytes) / 1024 / 1024
+        workers = min(
+            os.cpu_count() or 1, page_count, RENDER_MAX_WORKERS, int(RENDER_MEMORY_BUDGET_MB // worker_mb)
+        )
+        if workers < 2:
+            return [_render_page(doc, i, dpi, want, grayscale[i]) for i in range(page_count)]
+
+        if owned:
+            doc.close()
+            doc = None
+        # forkserver, not fork: the caller is usually the multithreaded
+        # Streamlit server, and forking it can deadlock the children.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=_init_render_worker,
+            initargs=(pdf_bytes,),
+        ) as executor:
+            return list(
+                executor.map(_render_one, range(page_count), repeat(dpi), repeat(want), grayscale)
+            )
 
-    except fitz.fitz.FileDataError as e:
+    except fitz.FileDataError as e:
         raise ValueError(f"Invalid or corrupted PDF file: {str(e)}")
     except MemoryError:
         raise
@@ -136,7 +320,7 @@ def pdf_to_page_images(
             raise ValueError(f"PDF processing error: {str(e)}")
         raise RuntimeError(f"Error processing PDF: {str(e)}")
     finally:
-        if doc:
+        if doc and owned:
             try:
                 doc.close()
             except:
@@ -144,11 +328,11 @@ def pdf_to_page_images(
         gc.collect()
 
 
-def extract_pdf_text(pdf_bytes: bytes, max_pages: int = 30) -> str:
+def extract_pdf_text(pdf: PdfSource, max_pages: int = 30) -> str:
     """Extract text from PDF - this uses minimal memory"""
-    doc = None
+    doc, owned = None, False
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        doc, owned = _open_pdf(pdf)
         texts = []
         for i in range(min(len(doc), max_pages)):
             try:
@@ -156,23 +340,23 @@ def extract_pdf_text(pdf_bytes: bytes, max_pages: int = 30) -> str:
             except Exception as e:
                 texts.append(f"[Error extracting text from page {i}: {str(e)}]")
         return "\n\n---\n\n".join(texts)
-    except fitz.fitz.FileDataError as e:
+    except fitz.FileDataError as e:
         raise ValueError(f"Invalid PDF file: {str(e)}")
     except Exception as e:
         raise RuntimeError(f"Error extracting PDF text: {str(e)}")
     finally:
-        if doc:
+        if doc and owned:
             try:
                 doc.close()
             except:
                 pass
 
 
-def extract_page_texts(pdf_bytes: bytes, max_pages: int = 80) -> dict[int, str]:
+def extract_page_texts(pdf: PdfSource, max_pages: int = 80) -> dict[int, str]:
     """Extract text from each page - minimal memory usage"""
-    doc = None
+    doc, owned = None, False
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        doc, owned = _open_pdf(pdf)
         out = {}
         for i in range(min(len(doc), max_pages)):
             try:
@@ -180,61 +364,64 @@ def extract_page_texts(pdf_bytes: bytes, max_pages: int = 80) -> dict[int, str]:
             except Exception as e:
                 out[i] = f"[Error: {str(e)}]"
         return out
-    except fitz.fitz.FileDataError as e:
+    except fitz.FileDataError as e:
         raise ValueError(f"Invalid PDF file: {str(e)}")
     except Exception as e:
         raise RuntimeError(f"Error extracting page texts: {str(e)}")
     finally:
-        if doc:
+        if doc and owned:
             try:
                 doc.close()
             except:
                 pass
 
 
+_SHEET_NUMBER_RE = re.compile(r"\b[A-Z]{1,4}-?\d{1,4}[A-Z]?\b")
+
+
 def extract_sheet_metadata(text: str) -> tuple[str, str]:
     """Extract sheet number and title from text"""
     if not text:
         return "", ""
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
     sheet_number = ""
     sheet_title = ""
-    number_pattern = re.compile(r"\b[A-Z]{1,4}-?\d{1,4}[A-Z]?\b")
-    for idx, line in enumerate(lines):
-        if not sheet_number:
-            match = number_pattern.search(line)
-            if match:
-                sheet_number = match.group(0)
-                if idx + 1 < len(lines):
-                    candidate = lines[idx + 1]
-                    if not number_pattern.search(candidate):
-                        sheet_title = candidate
-        if sheet_title:
-            break
+    # Sheet numbers never span lines, so the first match in the whole text is
+    # the first match of the first matching line; the title is the next
+    # non-blank line, unless that line holds another sheet number.
+    match = _SHEET_NUMBER_RE.search(text)
+    if match:
+        sheet_number = match.group(0)
+        for line in text[match.end():].splitlines()[1:]:
+            candidate = line.strip()
+            if candidate:
+                if not _SHEET_NUMBER_RE.search(candidate):
+                    sheet_title = candidate
+                break
     if not sheet_title:
-        for line in lines:
+        for line in text.splitlines():
             if "PLAN" in line.upper():
-                sheet_title = line
+                sheet_title = line.strip()
                 break
     return sheet_number, sheet_title
 
 
 def extract_title_block_texts(
-    pdf_bytes: bytes,
+    pdf: PdfSource,
     max_pages: int = 30,
     right_fraction: float = 0.6
 ) -> List[str]:
     """Extract title block texts - minimal memory"""
-    doc = None
+    doc, owned = None, False
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        doc, owned = _open_pdf(pdf)
         out = []
         for i in range(min(len(doc), max_pages)):
             try:
                 page = doc.load_page(i)
+                # No clip here: a clipped pass trims a block crossing the edge
+                # and recomputes its x0, so the x0 check below would keep it.
                 blocks = page.get_text("blocks")
-                width = page.rect.width
-                right_edge = width * right_fraction
+                right_edge = page.rect.width * right_fraction
                 pieces = []
                 for block in blocks:
                     x0, _, _, _, text, *_ = block
@@ -244,12 +431,12 @@ def extract_title_block_texts(
             except Exception:
                 out.append(f"[Error extracting title block from page {i}]")
         return out
-    except fitz.fitz.FileDataError as e:
+    except fitz.FileDataError as e:
         raise ValueError(f"Invalid PDF file: {str(e)}")
     except Exception as e:
         raise RuntimeError(f"Error extracting title blocks: {str(e)}")
     finally:
-        if doc:
+        if doc and owned:
             try:
                 doc.close()
             except:
@@ -272,6 +459,23 @@ def detect_page_type(text: str, title_block_text: str) -> str:
         return "Floor Plan"
 
 
+def _image_digest(image_bytes: bytes) -> bytes:
+    return hashlib.blake2b(image_bytes, digest_size=16).digest()
+
+
+def _digest_cached(cache: dict, key, compute: Callable[[], object], size: int = IMAGE_CACHE_SIZE):
+    """Return cache[key], computing it outside the lock on a miss (FIFO eviction)."""
+    with _IMAGE_CACHE_LOCK:
+        if key in cache:
+            return cache[key]
+    value = compute()
+    with _IMAGE_CACHE_LOCK:
+        if len(cache) >= size:
+            cache.pop(next(iter(cache)))
+        cache[key] = value
+    return value
+
+
 class ImageQualityChecker:
     """Check image quality with memory safety"""
 
@@ -279,8 +483,32 @@ class ImageQualityChecker:
     MIN_HEIGHT = 1000
     MIN_DPI = 150
 
+    # The app scores every page in the quality report and again when choosing
+    # the image to send. Results are keyed by digest, not by the bytes, so the
+    # cache does not keep page PNGs alive after the app drops them.
+    CACHE_SIZE = 256
+    _cache: Dict[bytes, Dict] = {}
+
+    @staticmethod
+    def sharpness(img: Image.Image) -> float:
+        """Luma standard deviation, the sharpness proxy used for scoring"""
+        # ImageStat derives stddev from a C histogram; no per-pixel pass in Python
+        gray = img if img.mode == "L" else img.convert("L")
+        return ImageStat.Stat(gray).stddev[0]
+
     @staticmethod
     def _score_png(png_bytes: bytes) -> Dict:
+        """Analyze image quality, reusing the result for identical bytes"""
+        result = _digest_cached(
+            ImageQualityChecker._cache,
+            _image_digest(png_bytes or b""),
+            lambda: ImageQualityChecker._analyze_png(png_bytes),
+            ImageQualityChecker.CACHE_SIZE,
+        )
+        return {**result, "warnings": list(result["warnings"])}
+
+    @staticmethod
+    def _analyze_png(png_bytes: bytes) -> Dict:
         """Analyze image quality"""
         try:
             img = Image.open(io.BytesIO(png_bytes))
@@ -289,8 +517,7 @@ class ImageQualityChecker:
             dpi = img.info.get('dpi', (None, None))
             dpi_x, dpi_y = dpi if isinstance(dpi, tuple) else (dpi, dpi)
 
-            stat = ImageStat.Stat(img.convert('L'))
-            sharpness = stat.stddev[0]
+            sharpness = ImageQualityChecker.sharpness(img)
 
             file_size_kb = len(png_bytes) / 1024
 
@@ -359,6 +586,15 @@ class ImageQualityChecker:
         return "base", a
 
 
+_SCALE_RE = re.compile(r'(\d+(?:\s+\d+/\d+|/\d+)?)"?\s*=\s*(\d+)\'-(\d+)"')
+# Feet-inches, inches-only and feet-only, tried in that order by one match().
+_DIMENSION_RE = re.compile(
+    r"(?P<feet>\d+)'-(?P<inches>\d+)\""
+    r"|(?P<inches_only>\d+(?:\.\d+)?)\""
+    r"|(?P<feet_only>\d+(?:\.\d+)?)'"
+)
+
+
 def _parse_fraction(s: str) -> float:
     s = s.strip()
     if "/" in s:
@@ -388,7 +624,7 @@ class ScaleVerifier:
         if scale_str in ScaleVerifier.COMMON_SCALES:
             return ScaleVerifier.COMMON_SCALES[scale_str]
 
-        match = re.match(r'(\d+(?:\s+\d+/\d+|/\d+)?)"?\s*=\s*(\d+)\'-(\d+)"', scale_str)
+        match = _SCALE_RE.match(scale_str)
         if match:
             inches_on_paper_raw = match.group(1).replace(" ", "")
             inches_on_paper = _parse_fraction(inches_on_paper_raw)
@@ -423,23 +659,25 @@ class ScaleVerifier:
 class MeasurementValidator:
     """Validates extracted measurements against code requirements"""
 
-    FHA_REQUIREMENTS = {
+    __slots__ = ("ruleset", "requirements")
+
+    FHA_REQUIREMENTS = MappingProxyType({
         "door_clear_opening": (32.0, "inches"),
         "route_width": (36.0, "inches"),
         "bathroom_turning_circle": (60.0, "inches"),
         "kitchen_work_aisle": (40.0, "inches"),
         "maneuvering_clearance_pull_side": (18.0, "inches"),
         "maneuvering_clearance_push_side": (0.0, "inches"),
-    }
+    })
 
-    ANSI_A117_TYPE_A_REQUIREMENTS = {
+    ANSI_A117_TYPE_A_REQUIREMENTS = MappingProxyType({
         "door_clear_opening": (32.0, "inches"),
         "route_width": (36.0, "inches"),
         "bathroom_turning_circle": (60.0, "inches"),
         "kitchen_work_aisle": (40.0, "inches"),
         "toilet_centerline_to_wall": (18.0, "inches"),
         "toilet_clearance_depth": (56.0, "inches"),
-    }
+    })
 
     def __init__(self, ruleset: str):
         self.ruleset = ruleset
@@ -450,36 +688,43 @@ class MeasurementValidator:
 
     def parse_dimension(self, dim_str: str) -> Optional[float]:
         """Parse dimension string to inches"""
-        feet_inches = re.match(r"(\d+)'-(\d+)\"", dim_str)
-        if feet_inches:
-            feet, inches = feet_inches.groups()
-            return int(feet) * 12 + int(inches)
-
-        inches_only = re.match(r"(\d+(?:\.\d+)?)\"", dim_str)
-        if inches_only:
-            return float(inches_only.group(1))
-
-        feet_only = re.match(r"(\d+(?:\.\d+)?)'", dim_str)
-        if feet_only:
-            return float(feet_only.group(1)) * 12
-
-        return None
+        match = _DIMENSION_RE.match(dim_str)
+        if not match:
+            return None
+        if match.group("feet"):
+            return int(match.group("feet")) * 12 + int(match.group("inches"))
+        if match.group("inches_only"):
+            return float(match.group("inches_only"))
+        return float(match.group("feet_only")) * 12
+
+    def is_compliant(self, element_type: str, measured_value: float) -> Optional[Tuple[bool, float]]:
+        """(compliant, difference) for a measurement, or None for unknown elements"""
+        requirement = self.requirements.get(element_type)
+        if requirement is None:
+            return None
+        difference = measured_value - requirement[0]
+        return difference >= 0, difference
+
+    def format_message(self, element_type: str, measured_value: float) -> str:
+        """Human-readable result line for a known element type"""
+        required_value, unit = self.requirements[element_type]
+        compliant = measured_value >= required_value
+        return f"{'✓' if compliant else '✗'} {measured_value}{unit} (required: {required_value}{unit})"
 
     def validate_measurement(self, element_type: str, measured_value: float) -> Dict:
         """Check if measurement meets code requirements"""
-        if element_type not in self.requirements:
+        result = self.is_compliant(element_type, measured_value)
+        if result is None:
             return {"compliant": None, "message": "Unknown element type"}
 
+        compliant, difference = result
         required_value, unit = self.requirements[element_type]
 
-        compliant = measured_value >= required_value
-        difference = measured_value - required_value
-
         return {
             "compliant": compliant,
             "measured": measured_value,
             "required": required_value,
             "difference": difference,
             "unit": unit,
-            "message": f"{'✓' if compliant else '✗'} {measured_value}{unit} (required: {required_value}{unit})"
+            "message": self.format_message(element_type, measured_value),
         }
@@ -3,9 +3,12 @@ Quality analysis and metrics for reviews
 Place this in src/quality_analysis.py
 """
 
+import re
 from typing import List, Dict
 from .schemas import ReviewResult, ReviewQualityMetrics
 
+_HAS_DIGIT = re.compile(r"\d")
+
 class ReviewQualityAnalyzer:
     """Analyze the quality and completeness of a review"""
     
@@ -24,13 +27,15 @@ class ReviewQualityAnalyzer:
         high_confidence = 0
         with_measurements = 0
         with_references = 0
+        has_digit = _HAS_DIGIT.search
         
         for page in result.pages:
-            total_issues += len(page.issues)
-            for issue in page.issues:
+            issues = page.issues
+            total_issues += len(issues)
+            for issue in issues:
                 if issue.confidence == "High":
                     high_confidence += 1
-                if issue.measurement or any(char.isdigit() for char in issue.finding):
+                if issue.measurement or has_digit(issue.finding):
                     with_measurements += 1
                 if issue.reference:
                     with_references += 1
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from typing import List
+import importlib.util
+from typing import Dict, List, Optional
 
 import fitz
-from PIL import Image
-import io
+
+from .pdf_utils import PdfSource, _open_pdf
+
+ahocorasick = None
+if importlib.util.find_spec("ahocorasick") is not None:
+    import ahocorasick
 
 ANCHOR_PHRASES = {
     "Floor Plan": ["FLOOR PLAN", "UNIT PLAN"],
@@ -14,47 +19,101 @@ ANCHOR_PHRASES = {
 }
 
 
-def _find_anchor_blocks(blocks, phrases: list[str]):
-    anchors = []
+# With pyahocorasick installed, one automaton finds every tag's anchor phrases
+# in a single pass over each block. A phrase maps to (tag, rank) so the
+# earliest-listed phrase of a tag wins, as in the plain substring loop.
+_ANCHOR_AUTOMATON = None
+if ahocorasick is not None:
+    _ANCHOR_AUTOMATON = ahocorasick.Automaton()
+    for _tag, _phrases in ANCHOR_PHRASES.items():
+        for _rank, _phrase in enumerate(_phrases):
+            if _phrase not in _ANCHOR_AUTOMATON:
+                _ANCHOR_AUTOMATON.add_word(_phrase, [])
+            _ANCHOR_AUTOMATON.get(_phrase).append((_tag, _rank, _phrase))
+    _ANCHOR_AUTOMATON.make_automaton()
+    del _tag, _phrases, _rank, _phrase
+
+
+def _block_anchor_phrases(normalized: str, wanted: Dict[str, List[str]]) -> Dict[str, str]:
+    """First listed anchor phrase of each wanted tag that occurs in the text"""
+    if _ANCHOR_AUTOMATON is None:
+        hits = {}
+        for tag, phrases in wanted.items():
+            for phrase in phrases:
+                if phrase in normalized:
+                    hits[tag] = phrase
+                    break
+        return hits
+    best: Dict[str, tuple] = {}
+    for _, entries in _ANCHOR_AUTOMATON.iter(normalized):
+        for tag, rank, phrase in entries:
+            if tag in wanted and (tag not in best or rank < best[tag][0]):
+                best[tag] = (rank, phrase)
+    return {tag: phrase for tag, (_, phrase) in best.items()}
+
+
+def _find_anchor_blocks(blocks, tags: list[str]) -> Dict[str, List[dict]]:
+    """Anchor blocks for every requested tag, from one walk over the blocks"""
+    wanted = {tag: ANCHOR_PHRASES[tag] for tag in tags if ANCHOR_PHRASES.get(tag)}
+    anchors: Dict[str, List[dict]] = {tag: [] for tag in wanted}
+    if not wanted:
+        return anchors
     for block in blocks:
         x0, y0, x1, y1, text, *_ = block
         if not text:
             continue
-        normalized = text.upper()
-        for phrase in phrases:
-            if phrase in normalized:
-                anchors.append({"bbox": (x0, y0, x1, y1), "text": text.strip(), "phrase": phrase})
-                break
+        for tag, phrase in _block_anchor_phrases(text.upper(), wanted).items():
+            anchors[tag].append({"bbox": (x0, y0, x1, y1), "text": text.strip(), "phrase": phrase})
     return anchors
 
 
-def _crop_region(image: Image.Image, bbox, scale: float) -> bytes:
-    x0, y0, x1, y1 = bbox
-    px0 = max(0, int(x0 * scale))
-    py0 = max(0, int(y0 * scale))
-    px1 = min(image.width, int(x1 * scale))
-    py1 = min(image.height, int(y1 * scale))
-    cropped = image.crop((px0, py0, px1, py1))
-    buf = io.BytesIO()
-    cropped.save(buf, format="PNG", optimize=True)
-    return buf.getvalue()
+def _crop_region(page: fitz.Page, bbox, matrix: fitz.Matrix) -> bytes:
+    # MuPDF rasterizes only the clip rectangle and encodes the PNG itself, so
+    # the full page is never rendered or copied into PIL.
+    pix = page.get_pixmap(matrix=matrix, clip=fitz.Rect(bbox) & page.rect, alpha=False)
+    return pix.tobytes("png")
 
 
 def extract_regions(
-    pdf_bytes: bytes,
+    pdf: PdfSource,
     page_index: int,
     dpi: int,
     selected_tags: list[str],
+    page_png: Optional[bytes] = None,
+) -> List[dict]:
+    """Crop tagged regions from a page.
+
+    page_png, when given, is the caller's existing full-page render at the same
+    dpi; it is reused for tags with no anchor instead of rasterizing again.
+    """
+    doc, owned = _open_pdf(pdf)
+    try:
+        return _extract_page_regions(doc.load_page(page_index), dpi, selected_tags, page_png)
+    finally:
+        if owned:
+            doc.close()
+
+
+def _extract_page_regions(
+    page: fitz.Page, dpi: int, selected_tags: list[str], page_png: Optional[bytes] = None
 ) -> List[dict]:
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    page = doc.load_page(page_index)
     blocks = page.get_text("blocks")
     page_width = page.rect.width
     page_height = page.rect.height
 
     zoom = dpi / 72.0
-    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
-    image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    matrix = fitz.Matrix(zoom, zoom)
+
+    # Tags often share an anchor block or all fall back to the whole page, so
+    # each distinct crop is rasterized once per call.
+    crops: Dict[tuple, bytes] = {}
+    if page_png:
+        crops[(0, 0, page_width, page_height)] = page_png
+
+    def crop(bbox) -> bytes:
+        if bbox not in crops:
+            crops[bbox] = _crop_region(page, bbox, matrix)
+        return crops[bbox]
 
     regions: List[dict] = []
     pad_x = 100
@@ -63,9 +122,9 @@ def extract_regions(
     extra_w = 800
     extra_h = 1200
 
+    anchors_by_tag = _find_anchor_blocks(blocks, selected_tags)
     for tag in selected_tags:
-        phrases = ANCHOR_PHRASES.get(tag, [])
-        anchors = _find_anchor_blocks(blocks, phrases) if phrases else []
+        anchors = anchors_by_tag.get(tag, [])
 
         if anchors:
             for anchor in anchors:
@@ -85,7 +144,7 @@ def extract_regions(
                     {
                         "tag": tag,
                         "bbox": crop_bbox,
-                        "png_bytes": _crop_region(image, crop_bbox, zoom),
+                        "png_bytes": crop(crop_bbox),
                         "anchor_text": anchor["text"],
                         "confidence": "High",
                     }
@@ -96,7 +155,7 @@ def extract_regions(
                 {
                     "tag": tag,
                     "bbox": crop_bbox,
-                    "png_bytes": _crop_region(image, crop_bbox, zoom),
+                    "png_bytes": crop(crop_bbox),
                     "anchor_text": "",
                     "confidence": "Low",
                 }
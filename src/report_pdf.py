@@ -1,11 +1,95 @@
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
-from reportlab.platypus import Paragraph, Frame
+from reportlab.lib.colors import Color
+from reportlab.platypus import KeepTogether, PageBreak, Paragraph, SimpleDocTemplate, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT, TA_CENTER
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from copy import copy
 from io import BytesIO
 from datetime import datetime
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from .schemas import ReviewResult
+
+_STYLES = getSampleStyleSheet()
+
+
+class _Paragraph(Paragraph):
+    """Paragraph that keeps its line breaks when re-wrapped at the same width.
+
+    KeepTogether wraps its content once to measure it and the frame wraps
+    it again to draw it; line breaking only depends on the width.
+    """
+
+    _wrapped_width = None
+
+    def wrap(self, availWidth, availHeight):
+        if availWidth == self._wrapped_width:
+            return self.width, self.height
+        size = super().wrap(availWidth, availHeight)
+        self._wrapped_width = availWidth
+        return size
+
+
+def _style(name, font_name, font_size, alignment=TA_LEFT, **kwargs) -> ParagraphStyle:
+    kwargs.setdefault("leading", font_size * 1.2)
+    return ParagraphStyle(
+        name,
+        parent=_STYLES['Normal'],
+        fontName=font_name,
+        fontSize=font_size,
+        alignment=alignment,
+        **kwargs,
+    )
+
+
+# Vertical gaps and footer positions, in points.
+_ISSUE_GAP = 0.3 * inch
+_PAGE_GAP = 0.2 * inch
+_FOOTER_PAGE_Y = 0.55 * inch
+_FOOTER_SUBTITLE_Y = 0.4 * inch
+
+# Built once and shared by every report.
+_REPORT_STYLES = {
+    "title": _style("ReportTitle", "Helvetica-Bold", 20, TA_CENTER, spaceAfter=0.5 * inch - 24),
+    "project": _style("ReportProject", "Helvetica-Bold", 16, TA_CENTER, spaceAfter=inch - 19.2),
+    "meta": _style("ReportMeta", "Helvetica", 11, leftIndent=0.5 * inch, spaceAfter=0.3 * inch - 13.2),
+    "heading": _style("ReportHeading", "Helvetica-Bold", 12, spaceAfter=0.3 * inch - 14.4),
+    "summary": _style("ReportSummary", "Helvetica", 10, spaceAfter=0.5 * inch),
+    "disclaimer": _style("ReportDisclaimer", "Helvetica-Oblique", 8),
+    "page_header": _style(
+        "ReportPageHeader",
+        "Helvetica-Bold",
+        12,
+        backColor=Color(0.9, 0.9, 0.9),
+        borderPadding=(0.1 * inch, 0.1 * inch, 0.1 * inch, 0.1 * inch),
+        spaceBefore=0.1 * inch,
+        spaceAfter=0.25 * inch,
+    ),
+    "sheet": _style("ReportSheet", "Helvetica", 9, spaceAfter=0.25 * inch - 10.8),
+    "confirmation": _style("ReportConfirmation", "Helvetica-Oblique", 8, spaceAfter=0.3 * inch - 9.6),
+    "page_summary": _style("ReportPageSummary", "Helvetica-Oblique", 9, spaceAfter=0.3 * inch),
+    "no_issues": _style("ReportNoIssues", "Helvetica", 9, spaceAfter=0.4 * inch),
+    "confidence": _style("ReportConfidence", "Helvetica-Oblique", 8, leftIndent=0.2 * inch, spaceAfter=0.2 * inch - 9.6),
+    "body": _style("ReportBody", "Helvetica", 9, leftIndent=0.2 * inch, spaceAfter=0.15 * inch),
+    "reference": _style("ReportReference", "Helvetica-Oblique", 8, leftIndent=0.2 * inch, spaceAfter=0.15 * inch),
+}
+
+DISCLAIMER_TEXT = (
+    "DISCLAIMER: This review is provided as preliminary guidance only and does not replace "
+    "professional judgment, field verification, or jurisdictional review. All measurements "
+    "and findings should be verified on-site before making final decisions."
+)
+# Parsed once; each report takes a shallow copy so wrap() state is not shared.
+_DISCLAIMER_PARA = _Paragraph(DISCLAIMER_TEXT, _REPORT_STYLES["disclaimer"])
+
 
 def safe_str(v):
     return "" if v is None else str(v)
@@ -21,7 +105,9 @@ class FooterCanvas(canvas.Canvas):
         self._startPage()
 
     def save(self):
-        self._saved_page_states.append(dict(self.__dict__))
+        # Platypus has already flushed the last page through showPage().
+        if self._code:
+            self._saved_page_states.append(dict(self.__dict__))
         page_count = len(self._saved_page_states)
         for page_number, state in enumerate(self._saved_page_states, start=1):
             self.__dict__.update(state)
@@ -30,56 +116,29 @@ class FooterCanvas(canvas.Canvas):
         super().save()
 
     def _draw_footer(self, page_number, page_count):
+        # Both footer lines go out as a single text object.
         w, _ = self._pagesize
-        self.setFont("Helvetica", 8)
-        self.drawCentredString(w / 2, 0.55 * inch, f"Page {page_number}")
-        self.setFont("Helvetica-Oblique", 8)
-        self.drawCentredString(w / 2, 0.4 * inch, self.footer_subtitle)
+        label = f"Page {page_number}"
+        text = self.beginText()
+        text.setFont("Helvetica", 8)
+        text.setTextOrigin((w - self.stringWidth(label, "Helvetica", 8)) / 2, _FOOTER_PAGE_Y)
+        text.textOut(label)
+        text.setFont("Helvetica-Oblique", 8)
+        subtitle_width = self.stringWidth(self.footer_subtitle, "Helvetica-Oblique", 8)
+        text.setTextOrigin((w - subtitle_width) / 2, _FOOTER_SUBTITLE_Y)
+        text.textOut(self.footer_subtitle)
+        self.drawText(text)
+
+_SEVERITY_COLORS = {
+    "High": (0.78, 0.1, 0.1),
+    "Medium": (0.9, 0.55, 0.1),
+    "Low": (0.15, 0.6, 0.3),
+}
+_SEVERITY_SYMBOLS = {"High": "●", "Medium": "◐", "Low": "○"}
 
-def wrap_text(c, text, x, y, max_width, font_name="Helvetica", font_size=9, leading=None):
-    """
-    Wrap text to fit within max_width and return the new y position.
-    """
-    if leading is None:
-        leading = font_size * 1.2
-    
-    # Create a paragraph style
-    styles = getSampleStyleSheet()
-    style = ParagraphStyle(
-        'CustomStyle',
-        parent=styles['Normal'],
-        fontName=font_name,
-        fontSize=font_size,
-        leading=leading,
-        alignment=TA_LEFT,
-    )
-    
-    # Create paragraph
-    para = Paragraph(text, style)
-    
-    # Calculate available height (estimate)
-    available_height = y - inch
-    
-    # Create a frame and draw
-    frame = Frame(x, y - available_height, max_width, available_height, 
-                  leftPadding=0, bottomPadding=0, rightPadding=0, topPadding=0)
-    
-    # Wrap the paragraph
-    w, h = para.wrap(max_width, available_height)
-    
-    # Draw it
-    para.drawOn(c, x, y - h)
-    
-    # Return new y position
-    return y - h - (leading * 0.5)
 
 def _severity_color(severity: str) -> tuple:
-    colors = {
-        "High": (0.78, 0.1, 0.1),
-        "Medium": (0.9, 0.55, 0.1),
-        "Low": (0.15, 0.6, 0.3),
-    }
-    return colors.get(severity, (0, 0, 0))
+    return _SEVERITY_COLORS.get(severity, (0, 0, 0))
 
 
 def _get_effective_severity(issue, annotations) -> str:
@@ -90,165 +149,152 @@ def _get_effective_severity(issue, annotations) -> str:
     return overrides.get(issue_id, issue.severity)
 
 
-def build_pdf_report(result, annotations=None):
-    buf = BytesIO()
-    c = FooterCanvas(buf, pagesize=letter)
-    w, h = letter
-    # Define margins
-    left_margin = inch
-    right_margin = w - inch
-    max_text_width = right_margin - left_margin
-    
-    # Define margins
-    left_margin = inch
-    right_margin = w - inch
-    max_text_width = right_margin - left_margin
+def _text(value) -> str:
+    """Model and user text escaped for Paragraph markup"""
+    return escape(safe_str(value))
+
+
+@lru_cache(maxsize=8)
+def _issue_header_style(severity: str) -> ParagraphStyle:
+    return _style(
+        f"ReportIssue{severity}",
+        "Helvetica-Bold",
+        10,
+        spaceAfter=0.2 * inch - 12,
+        textColor=Color(*_severity_color(severity)),
+    )
+
+
+def _issue_flowables(issue_num, issue, annotations) -> list:
+    effective_severity = _get_effective_severity(issue, annotations)
+    header_style = _issue_header_style(effective_severity)
+    header = (
+        f"{issue_num}. {_SEVERITY_SYMBOLS.get(effective_severity, '○')} "
+        f"[{effective_severity}] {_text(issue.location_hint)}"
+    )
+    body = _REPORT_STYLES["body"]
+    flowables = [
+        _Paragraph(header, header_style),
+        _Paragraph(f"Confidence: {_text(issue.confidence)}", _REPORT_STYLES["confidence"]),
+        _Paragraph(f"<b>Finding:</b> {_text(issue.finding)}", body),
+    ]
+    if issue.measurement:
+        flowables.append(_Paragraph(f"<b>Measured:</b> {_text(issue.measurement)}", body))
+    flowables.append(_Paragraph(f"<b>Recommendation:</b> {_text(issue.recommendation)}", body))
+    if issue.reference:
+        flowables.append(_Paragraph(f"<b>Reference:</b> {_text(issue.reference)}", _REPORT_STYLES["reference"]))
+    flowables.append(Spacer(1, _ISSUE_GAP))
+    return flowables
+
+
+def build_pdf_report(result, annotations=None, stream=None):
+    """
+    Render the review report as a PDF.
+
+    With no stream the PDF is returned as bytes. Otherwise it is written to
+    the given binary file-like object and None is returned, which avoids an
+    extra full copy of the document for callers writing to disk or a socket.
+    """
+    buf = BytesIO() if stream is None else stream
+    doc = SimpleDocTemplate(
+        buf,
+        pagesize=letter,
+        leftMargin=inch,
+        rightMargin=inch,
+        topMargin=inch,
+        bottomMargin=inch,
+        title="Accessibility Review Report",
+    )
+    styles = _REPORT_STYLES
 
     # ===== COVER PAGE =====
-    y = h - 2 * inch
-    
-    # Title
-    c.setFont("Helvetica-Bold", 20)
-    title = f"Accessibility Review Report"
-    c.drawCentredString(w / 2, y, title)
-    y -= 0.5 * inch
-    
-    c.setFont("Helvetica-Bold", 16)
-    c.drawCentredString(w / 2, y, safe_str(result.project_name))
-    y -= 1 * inch
-    
-    # Metadata box
-    c.setFont("Helvetica", 11)
-    c.drawString(left_margin + 0.5*inch, y, f"Ruleset: {safe_str(result.ruleset)}")
-    y -= 0.3 * inch
-    c.drawString(left_margin + 0.5*inch, y, f"Scale: {safe_str(result.scale_note)}")
-    y -= 0.3 * inch
-    c.drawString(left_margin + 0.5*inch, y, f"Date: {datetime.now().strftime('%B %d, %Y')}")
-    y -= 0.3 * inch
-    c.drawString(left_margin + 0.5*inch, y, f"Pages Reviewed: {len(result.pages)}")
-    y -= 0.3 * inch
-    
-    total_issues = sum(len(page.issues) for page in result.pages)
-    c.drawString(left_margin + 0.5*inch, y, f"Total Issues Found: {total_issues}")
-    y -= 1 * inch
-    
+    # One pass numbers every page's first issue and yields the cover total.
+    numbered_pages = []
+    total_issues = 0
+    for page in result.pages:
+        numbered_pages.append((page, total_issues + 1))
+        total_issues += len(page.issues)
+
+    story = [
+        Spacer(1, inch),
+        _Paragraph("Accessibility Review Report", styles["title"]),
+        _Paragraph(_text(result.project_name), styles["project"]),
+        _Paragraph(f"Ruleset: {_text(result.ruleset)}", styles["meta"]),
+        _Paragraph(f"Scale: {_text(result.scale_note)}", styles["meta"]),
+        _Paragraph(f"Date: {datetime.now().strftime('%B %d, %Y')}", styles["meta"]),
+        _Paragraph(f"Pages Reviewed: {len(result.pages)}", styles["meta"]),
+        _Paragraph(f"Total Issues Found: {total_issues}", styles["meta"]),
+        Spacer(1, inch - styles["meta"].spaceAfter),
+    ]
+
     # Overall summary
     if result.overall_summary:
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(left_margin, y, "Executive Summary")
-        y -= 0.3 * inch
-        
-        c.setFont("Helvetica", 10)
-        y = wrap_text(c, safe_str(result.overall_summary), left_margin, y, max_text_width, "Helvetica", 10)
-        y -= 0.5 * inch
-    
+        story.append(_Paragraph("Executive Summary", styles["heading"]))
+        story.append(_Paragraph(_text(result.overall_summary), styles["summary"]))
+
     # Disclaimer
-    c.setFont("Helvetica-Oblique", 8)
-    disclaimer = (
-        "DISCLAIMER: This review is provided as preliminary guidance only and does not replace "
-        "professional judgment, field verification, or jurisdictional review. All measurements "
-        "and findings should be verified on-site before making final decisions."
-    )
-    y = wrap_text(c, disclaimer, left_margin, y, max_text_width, "Helvetica-Oblique", 8)
-    
-    # Start new page for content
-    c.showPage()
-    y = h - inch
+    story.append(copy(_DISCLAIMER_PARA))
+    story.append(PageBreak())
 
     # ===== DETAILED FINDINGS =====
-    issue_num = 1
-    for page in result.pages:
-        # Check if we need a new page
-        if y < 2 * inch:
-            c.showPage()
-            y = h - inch
-
-        # Page header with background
-        c.setFillColorRGB(0.9, 0.9, 0.9)
-        c.rect(left_margin - 0.1*inch, y - 0.35*inch, max_text_width + 0.2*inch, 0.4*inch, fill=True, stroke=False)
-        c.setFillColorRGB(0, 0, 0)
-        
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(left_margin, y - 0.25*inch, f"Page {page.page_index} — {safe_str(page.page_label)}")
-        y -= 0.5 * inch
-        
-        # Sheet info
-        c.setFont("Helvetica", 9)
-        sheet_no = getattr(page, "sheet_number", None) or getattr(page, "sheet_id", None) or "N/A"
-        sheet_title = getattr(page, "sheet_title", None) or "N/A"
-        sheet_text = f"Sheet: {safe_str(sheet_no)} — {safe_str(sheet_title)}"
-        c.drawString(left_margin, y, sheet_text)
-        y -= 0.25 * inch
-        
-        # Review confirmation
-        c.setFont("Helvetica-Oblique", 8)
-        c.drawString(left_margin, y, "Review confirmation: Drawing image reviewed by AI model.")
-        y -= 0.3 * inch
-
-        # Page summary with wrapping
+    # Platypus handles wrapping and page breaks; each issue is kept on one page.
+    for page, first_num in numbered_pages:
+        sheet_no = page.sheet_id or "N/A"
+        sheet_title = page.sheet_title or "N/A"
+        page_block = [
+            _Paragraph(f"Page {page.page_index} — {_text(page.page_label)}", styles["page_header"]),
+            _Paragraph(f"Sheet: {_text(sheet_no)} — {_text(sheet_title)}", styles["sheet"]),
+            _Paragraph("Review confirmation: Drawing image reviewed by AI model.", styles["confirmation"]),
+        ]
         if page.summary:
-            c.setFont("Helvetica-Oblique", 9)
-            y = wrap_text(c, f"Summary: {safe_str(page.summary)}", left_margin, y, max_text_width, "Helvetica-Oblique", 9)
-            y -= 0.3 * inch
+            page_block.append(_Paragraph(f"Summary: {_text(page.summary)}", styles["page_summary"]))
 
         if not page.issues:
-            c.setFont("Helvetica", 9)
-            c.drawString(left_margin, y, "✓ No issues reported for this page.")
-            y -= 0.4 * inch
+            page_block.append(_Paragraph("✓ No issues reported for this page.", styles["no_issues"]))
+            story.append(KeepTogether(page_block))
         else:
-            for idx, issue in enumerate(page.issues, 1):
-                # Check if we need a new page before each issue
-                if y < 2.5 * inch:
-                    c.showPage()
-                    y = h - inch
-                
-                # Issue number and severity badge
-                effective_severity = _get_effective_severity(issue, annotations)
-                c.setFont("Helvetica-Bold", 10)
-                c.setFillColorRGB(*_severity_color(effective_severity))
-                severity_symbol = {"High": "●", "Medium": "◐", "Low": "○"}
-                header = (
-                    f"{issue_num}. {severity_symbol.get(effective_severity, '○')} "
-                    f"[{effective_severity}] {safe_str(issue.location_hint)}"
-                )
-                c.drawString(left_margin, y, header)
-                c.setFillColorRGB(0, 0, 0)
-                y -= 0.2 * inch
-                
-                # Confidence indicator
-                c.setFont("Helvetica-Oblique", 8)
-                c.drawString(left_margin + 0.2*inch, y, f"Confidence: {safe_str(issue.confidence)}")
-                y -= 0.2 * inch
-                
-                # Finding with wrapping
-                c.setFont("Helvetica", 9)
-                finding_text = f"<b>Finding:</b> {safe_str(issue.finding)}"
-                y = wrap_text(c, finding_text, left_margin + 0.2*inch, y, max_text_width - 0.2*inch, "Helvetica", 9)
-                y -= 0.15 * inch
-                
-                # Measurement if present
-                if issue.measurement:
-                    c.setFont("Helvetica", 9)
-                    meas_text = f"<b>Measured:</b> {safe_str(issue.measurement)}"
-                    y = wrap_text(c, meas_text, left_margin + 0.2*inch, y, max_text_width - 0.2*inch, "Helvetica", 9)
-                    y -= 0.15 * inch
-                
-                # Recommendation with wrapping
-                rec_text = f"<b>Recommendation:</b> {safe_str(issue.recommendation)}"
-                y = wrap_text(c, rec_text, left_margin + 0.2*inch, y, max_text_width - 0.2*inch, "Helvetica", 9)
-                y -= 0.15 * inch
-                
-                # Reference if present
-                if issue.reference:
-                    c.setFont("Helvetica-Oblique", 8)
-                    ref_text = f"<b>Reference:</b> {safe_str(issue.reference)}"
-                    y = wrap_text(c, ref_text, left_margin + 0.2*inch, y, max_text_width - 0.2*inch, "Helvetica-Oblique", 8)
-                    y -= 0.15 * inch
-
-                y -= 0.3 * inch
-                issue_num += 1
-        
-        y -= 0.2 * inch
-
-    c.save()
-    return buf.getvalue()
+            # Keep the page header with its first issue so it never ends a page.
+            first, *rest = page.issues
+            story.append(KeepTogether(page_block + _issue_flowables(first_num, first, annotations)))
+            for issue_num, issue in enumerate(rest, first_num + 1):
+                story.append(KeepTogether(_issue_flowables(issue_num, issue, annotations)))
+
+        story.append(Spacer(1, _PAGE_GAP))
+
+    doc.build(story, canvasmaker=FooterCanvas)
+    return buf.getvalue() if stream is None else None
+
+
+# Report rendering is CPU-bound pure Python, so background builds go to
+# worker processes rather than threads. The pool is created on first use,
+# kept small, and started via forkserver: forking the multithreaded
+# Streamlit server directly can deadlock the child.
+REPORT_WORKERS = 2
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ProcessPoolExecutor(
+                max_workers=min(REPORT_WORKERS, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+            atexit.register(_EXECUTOR.shutdown, wait=False, cancel_futures=True)
+        return _EXECUTOR
+
+
+def _build_from_dump(payload: dict, annotations=None) -> bytes:
+    return build_pdf_report(ReviewResult.model_validate(payload), annotations)
+
+
+def build_pdf_report_async(result, annotations=None) -> Future:
+    """
+    Start building the report in a worker process.
+
+    The result travels as its model_dump() and is revalidated in the worker;
+    the returned Future resolves to the PDF bytes.
+    """
+    return _get_executor().submit(_build_from_dump, result.model_dump(), annotations)
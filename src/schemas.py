@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Literal, Optional, Dict
 
 Ruleset = Literal["FHA", "ANSI_A1171_TYPE_A", "ANSI_A1171_TYPE_B"]
@@ -32,6 +32,8 @@ class ReviewResult(BaseModel):
     pages: List[PageReview]
 
 class ImageQualityMetrics(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     width: int
     height: int
     dpi: str
@@ -42,6 +44,8 @@ class ImageQualityMetrics(BaseModel):
     suitable_for_review: bool
 
 class ReviewQualityMetrics(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     total_issues: int
     high_confidence_issues: int
     issues_with_measurements: int
@@ -1,12 +1,58 @@
+import importlib.util
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Optional
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Dict, Optional, Tuple
 import json
 
+orjson = None
+if importlib.util.find_spec("orjson") is not None:
+    import orjson
+
 DB_PATH = "reviews.db"
+RESPONSE_CACHE_TTL_DAYS = 30
+
+_INSERT_REVIEW_SQL = (
+    "INSERT INTO reviews (created_at_ts, project_name, ruleset, scale_note, result_json) VALUES (?, ?, ?, ?, ?)"
+)
+# Reviews store UTC unix seconds in created_at_ts; rows saved before that
+# column existed only have the ISO text in created_at. Reads return ISO text.
+_REVIEW_CREATED_AT_SQL = "COALESCE(created_at, strftime('%Y-%m-%dT%H:%M:%S', created_at_ts, 'unixepoch'))"
+
+def dumps_result_json(payload) -> str:
+    """Serialize a review payload for the result_json column"""
+    if orjson is not None:
+        return orjson.dumps(payload).decode("utf-8")
+    return json.dumps(payload)
+
+def _loads_result_json(text: str):
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+# One long-lived connection per database file, shared by the Streamlit script
+# threads. The lock serializes access since a sqlite3 connection is not safe to
+# use from several threads at once.
+_DB_LOCK = threading.RLock()
+
+@lru_cache(maxsize=None)
+def _shared_connection(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+@contextmanager
+def _connect():
+    """Shared connection for DB_PATH; commits on success, rolls back on error"""
+    with _DB_LOCK:
+        conn = _shared_connection(DB_PATH)
+        with conn:
+            yield conn
 
 def init_db():
-    with sqlite3.connect(DB_PATH) as conn:
+    with _connect() as conn:
         conn.execute("""
         CREATE TABLE IF NOT EXISTS reviews (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -14,29 +60,191 @@ def init_db():
             project_name TEXT,
             ruleset TEXT,
             scale_note TEXT,
-            result_json TEXT
+            result_json TEXT,
+            created_at_ts INTEGER
         )
         """)
-        conn.commit()
+        _migrate_review_timestamps(conn)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reviews_project_created_ts "
+            "ON reviews (project_name, created_at_ts DESC, id DESC)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_project_id ON reviews (project_name, id DESC)")
+        _ensure_issue_table(conn)
+        _ensure_response_cache(conn)
+        _ensure_page_review_cache(conn)
+
+def _migrate_review_timestamps(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(reviews)")}
+    if "created_at_ts" in columns:
+        return
+    conn.execute("ALTER TABLE reviews ADD COLUMN created_at_ts INTEGER")
+    conn.execute("UPDATE reviews SET created_at_ts = CAST(strftime('%s', created_at) AS INTEGER)")
+    conn.execute("DROP INDEX IF EXISTS idx_reviews_project_created")
+
+def _ensure_issue_table(conn):
+    # One row per distinct issue signature of a saved review, so that
+    # review-to-review diffs can be computed with SQL set operations.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS issues (
+        review_id INTEGER,
+        page_index INTEGER,
+        location_hint TEXT,
+        severity TEXT,
+        sig TEXT,
+        occurrences INTEGER,
+        PRIMARY KEY (review_id, sig)
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_review ON issues (review_id)")
+
+def _issue_rows(review_id: int, payload) -> List[Tuple]:
+    """issues-table rows for a stored result_json payload
+
+    The index is derived data, so malformed pages and issues are skipped
+    rather than failing the save of the review itself.
+    """
+    if isinstance(payload, dict) and "review" in payload:
+        payload = payload.get("review")
+    if not isinstance(payload, dict):
+        return []
+    rows = {}
+    for page in payload.get("pages") or []:
+        if not isinstance(page, dict) or page.get("page_index") is None:
+            continue
+        page_index = page["page_index"]
+        for issue in page.get("issues") or []:
+            if not isinstance(issue, dict):
+                continue
+            location_hint, severity = issue.get("location_hint"), issue.get("severity")
+            if location_hint is None or severity is None:
+                continue
+            sig = f"{page_index}:{location_hint}:{severity}"
+            row = rows.get(sig)
+            if row is None:
+                rows[sig] = [review_id, page_index, location_hint, severity, sig, 1]
+            else:
+                row[5] += 1
+    return [tuple(row) for row in rows.values()]
+
+def _insert_issue_rows(conn, review_id: int, result_json: str):
+    try:
+        payload = _loads_result_json(result_json)
+    except (TypeError, ValueError):
+        return
+    conn.executemany(
+        "INSERT OR REPLACE INTO issues (review_id, page_index, location_hint, severity, sig, occurrences) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        _issue_rows(review_id, payload),
+    )
+
+def _ensure_response_cache(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS llm_response_cache (
+        cache_key TEXT PRIMARY KEY,
+        created_at TEXT,
+        response_text TEXT
+    )
+    """)
+
+def get_cached_response(cache_key: str) -> Optional[str]:
+    """Return a stored raw LLM response for this request key if it is still fresh"""
+    cutoff = (datetime.utcnow() - timedelta(days=RESPONSE_CACHE_TTL_DAYS)).isoformat()
+    with _connect() as conn:
+        _ensure_response_cache(conn)
+        row = conn.execute(
+            "SELECT response_text FROM llm_response_cache WHERE cache_key = ? AND created_at >= ?",
+            (cache_key, cutoff),
+        ).fetchone()
+        return row[0] if row else None
+
+def save_cached_response(cache_key: str, response_text: str):
+    with _connect() as conn:
+        _ensure_response_cache(conn)
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_response_cache (cache_key, created_at, response_text) VALUES (?, ?, ?)",
+            (cache_key, datetime.utcnow().isoformat(), response_text),
+        )
+
+def _ensure_page_review_cache(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS page_review_cache (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT,
+        ruleset TEXT,
+        page_label TEXT,
+        model_name TEXT,
+        image_hash TEXT,
+        page_text TEXT,
+        page_json TEXT
+    )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_page_review_cache_lookup "
+        "ON page_review_cache (ruleset, page_label, model_name)"
+    )
+
+def find_page_reviews(ruleset: str, page_label: str, model_name: str, limit: int = 500) -> List[Dict]:
+    """Fresh stored page reviews for near-duplicate matching, newest first"""
+    cutoff = (datetime.utcnow() - timedelta(days=RESPONSE_CACHE_TTL_DAYS)).isoformat()
+    with _connect() as conn:
+        _ensure_page_review_cache(conn)
+        rows = conn.execute(
+            """
+            SELECT image_hash, page_text, page_json
+            FROM page_review_cache
+            WHERE ruleset = ? AND page_label = ? AND model_name = ? AND created_at >= ?
+            ORDER BY created_at DESC
+            LIMIT ?
+            """,
+            (ruleset, page_label, model_name, cutoff, limit),
+        ).fetchall()
+    return [{"image_hash": row[0], "page_text": row[1], "page_json": row[2]} for row in rows]
+
+def save_page_review(ruleset: str, page_label: str, model_name: str, image_hash: str, page_text: str, page_json: str):
+    with _connect() as conn:
+        _ensure_page_review_cache(conn)
+        conn.execute(
+            "INSERT INTO page_review_cache (created_at, ruleset, page_label, model_name, image_hash, page_text, page_json) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (datetime.utcnow().isoformat(), ruleset, page_label, model_name, image_hash, page_text, page_json),
+        )
 
 def save_review(project_name, ruleset, scale_note, result_json):
-    with sqlite3.connect(DB_PATH) as conn:
+    with _connect() as conn:
         cur = conn.execute(
-            "INSERT INTO reviews (created_at, project_name, ruleset, scale_note, result_json) VALUES (?, ?, ?, ?, ?)",
-            (datetime.utcnow().isoformat(), project_name, ruleset, scale_note, result_json),
+            _INSERT_REVIEW_SQL,
+            (int(time.time()), project_name, ruleset, scale_note, result_json),
         )
-        conn.commit()
+        _insert_issue_rows(conn, cur.lastrowid, result_json)
         return cur.lastrowid
 
+def save_reviews(rows: Iterable[Tuple[str, str, str, str]]) -> int:
+    """Insert (project_name, ruleset, scale_note, result_json) rows in one transaction"""
+    rows = list(rows)
+    created_at = int(time.time())
+    with _connect() as conn:
+        cur = conn.executemany(
+            _INSERT_REVIEW_SQL,
+            ((created_at, project_name, ruleset, scale_note, result_json)
+             for project_name, ruleset, scale_note, result_json in rows),
+        )
+        # AUTOINCREMENT ids within one locked transaction are consecutive.
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        first_id = last_id - len(rows) + 1
+        for offset, row in enumerate(rows):
+            _insert_issue_rows(conn, first_id + offset, row[3])
+        return cur.rowcount
+
 def get_project_review_history(project_name: str, limit: int = 10) -> List[Dict]:
     """Get review history for a project"""
-    with sqlite3.connect(DB_PATH) as conn:
+    with _connect() as conn:
         cursor = conn.execute(
-            """
-            SELECT id, created_at, ruleset, scale_note, result_json
+            f"""
+            SELECT id, {_REVIEW_CREATED_AT_SQL}, ruleset, scale_note, result_json
             FROM reviews
             WHERE project_name = ?
-            ORDER BY created_at DESC
+            ORDER BY created_at_ts DESC, id DESC
             LIMIT ?
             """,
             (project_name, limit)
@@ -45,22 +253,51 @@ def get_project_review_history(project_name: str, limit: int = 10) -> List[Dict]
         
         history = []
         for row in rows:
-            payload = json.loads(row[4])
-            if isinstance(payload, dict) and "review" in payload:
-                review_payload = payload.get("review", {})
-            else:
-                review_payload = payload
             history.append(
                 {
                     "id": row[0],
                     "created_at": row[1],
                     "ruleset": row[2],
                     "scale_note": row[3],
-                    "result": {"review": review_payload},
+                    "result": _review_package(row[4]),
                 }
             )
         return history
 
+def _review_package(result_json: str) -> Dict:
+    """Stored result_json normalized to {"review": ...}"""
+    payload = _loads_result_json(result_json)
+    if isinstance(payload, dict) and "review" in payload:
+        return {"review": payload.get("review", {})}
+    return {"review": payload}
+
+def list_reviews(project_name: str, before_id: Optional[int] = None, limit: int = 10) -> List[Dict]:
+    """Review metadata for a project, newest first, without the stored JSON.
+
+    Pass the smallest id of the previous page as before_id to fetch the next one.
+    """
+    with _connect() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT id, {_REVIEW_CREATED_AT_SQL}, ruleset, scale_note
+            FROM reviews
+            WHERE project_name = ? AND (? IS NULL OR id < ?)
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (project_name, before_id, before_id, limit),
+        ).fetchall()
+    return [
+        {"id": row[0], "created_at": row[1], "ruleset": row[2], "scale_note": row[3]}
+        for row in rows
+    ]
+
+def get_review_json(review_id: int) -> Optional[Dict]:
+    """Stored result of one review as {"review": ...}, or None if it does not exist"""
+    with _connect() as conn:
+        row = conn.execute("SELECT result_json FROM reviews WHERE id = ?", (review_id,)).fetchone()
+    return _review_package(row[0]) if row else None
+
 def compare_reviews(old_review: Dict, new_review: Dict) -> Dict:
     """Compare two reviews and identify changes"""
     
@@ -69,10 +306,13 @@ def compare_reviews(old_review: Dict, new_review: Dict) -> Dict:
         signatures = set()
         for page in result.get("pages", []):
             for issue in page.get("issues", []):
-                # Create a simple signature based on location and finding keywords
-                sig = f"{page['page_index']}:{issue['location_hint']}:{issue['severity']}"
-                signatures.add(sig)
+                # Tuples hash without string formatting; only the differences
+                # are formatted below.
+                signatures.add((page['page_index'], issue['location_hint'], issue['severity']))
         return signatures
+
+    def format_signatures(sigs):
+        return [f"{page_index}:{location_hint}:{severity}" for page_index, location_hint, severity in sigs]
     
     old_sigs = extract_issue_signatures(old_review)
     new_sigs = extract_issue_signatures(new_review)
@@ -91,6 +331,48 @@ def compare_reviews(old_review: Dict, new_review: Dict) -> Dict:
         "new_issues_count": len(new_issues),
         "persistent_count": len(persistent),
         "improvement_percentage": ((old_total - new_total) / old_total * 100) if old_total > 0 else 0,
-        "resolved_signatures": list(resolved),
-        "new_issue_signatures": list(new_issues),
+        "resolved_signatures": format_signatures(resolved),
+        "new_issue_signatures": format_signatures(new_issues),
+    }
+
+def _issue_sigs_exist(conn, review_id: int) -> bool:
+    return conn.execute("SELECT 1 FROM issues WHERE review_id = ? LIMIT 1", (review_id,)).fetchone() is not None
+
+def compare_saved_reviews(old_id: int, new_id: int) -> Dict:
+    """compare_reviews for two saved reviews, computed from the issues table"""
+    with _connect() as conn:
+        for review_id in (old_id, new_id):
+            # Reviews saved before the issues table existed are indexed on first use.
+            if not _issue_sigs_exist(conn, review_id):
+                row = conn.execute("SELECT result_json FROM reviews WHERE id = ?", (review_id,)).fetchone()
+                if row is not None:
+                    _insert_issue_rows(conn, review_id, row[0])
+
+        def sigs(query, *params):
+            return [r[0] for r in conn.execute(query, params).fetchall()]
+
+        diff_sql = "SELECT sig FROM issues WHERE review_id = ? EXCEPT SELECT sig FROM issues WHERE review_id = ?"
+        resolved = sigs(diff_sql, old_id, new_id)
+        new_issues = sigs(diff_sql, new_id, old_id)
+        persistent_count = conn.execute(
+            "SELECT COUNT(*) FROM ("
+            "SELECT sig FROM issues WHERE review_id = ? INTERSECT SELECT sig FROM issues WHERE review_id = ?)",
+            (old_id, new_id),
+        ).fetchone()[0]
+        totals = dict(conn.execute(
+            "SELECT review_id, SUM(occurrences) FROM issues WHERE review_id IN (?, ?) GROUP BY review_id",
+            (old_id, new_id),
+        ).fetchall())
+
+    old_total = totals.get(old_id, 0)
+    new_total = totals.get(new_id, 0)
+    return {
+        "old_issue_count": old_total,
+        "new_issue_count": new_total,
+        "resolved_count": len(resolved),
+        "new_issues_count": len(new_issues),
+        "persistent_count": persistent_count,
+        "improvement_percentage": ((old_total - new_total) / old_total * 100) if old_total > 0 else 0,
+        "resolved_signatures": resolved,
+        "new_issue_signatures": new_issues,
     }
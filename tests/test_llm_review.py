@@ -0,0 +1,264 @@
+import asyncio
+import importlib.util
+import io
+import json
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from src.llm_review import (
+    _GEMINI_RESPONSE_SCHEMA,
+    _REVIEW_RESPONSE_FORMAT,
+    MAX_EXTRA_TEXT_CHARS,
+    OPENAI_MAX_TOKENS,
+    _bucket_pages,
+    _build_openai_content,
+    _clip_extra_text,
+    _coerce_json,
+    _DATA_URL_CACHE,
+    _DHASH_CACHE,
+    _VISION_GRID_CACHE,
+    _find_near_duplicate,
+    _fit_to_vision_grid,
+    _image_to_data_url,
+    _image_dhash,
+    _normalize_payload,
+    _openai_review_bucket,
+    _openai_system_message,
+    _parse_json,
+    build_enhanced_prompt,
+)
+
+
+class TestCoerceJson(unittest.TestCase):
+    def test_plain_object(self):
+        self.assertEqual(_coerce_json('{"pages": []}'), {"pages": []})
+
+    def test_fenced_object(self):
+        text = '```json\n{"pages": [{"page_index": 0}]}\n```'
+        self.assertEqual(_coerce_json(text), {"pages": [{"page_index": 0}]})
+
+    def test_object_with_surrounding_prose(self):
+        text = 'Here is the review:\n{"overall_summary": "ok"}\nLet me know.'
+        self.assertEqual(_coerce_json(text), {"overall_summary": "ok"})
+
+    def test_trailing_commas(self):
+        text = 'Result: {"pages": [{"issues": [],},],}'
+        self.assertEqual(_coerce_json(text), {"pages": [{"issues": []}]})
+
+    def test_trailing_commas_with_braces_in_prose_and_strings(self):
+        text = 'Result: {"finding": "see {note}", "issues": [1,],} -- end {x}'
+        self.assertEqual(_coerce_json(text), {"finding": "see {note}", "issues": [1]})
+
+    @unittest.skipUnless(importlib.util.find_spec("json_repair"), "json_repair not installed")
+    def test_truncated_object_is_repaired(self):
+        text = '{"pages": [{"page_index": 0, "summary": "cut off'
+        self.assertEqual(_coerce_json(text), {"pages": [{"page_index": 0, "summary": "cut off"}]})
+
+    def test_only_plain_json_is_strict(self):
+        self.assertEqual(_parse_json('{"pages": []}'), ({"pages": []}, True))
+        self.assertFalse(_parse_json('```json\n{"pages": []}\n```')[1])
+        self.assertFalse(_parse_json('{"pages": [1,],}')[1])
+
+    def test_invalid_raises(self):
+        with self.assertRaises(ValueError):
+            _coerce_json("no json here")
+        with self.assertRaises(ValueError):
+            _coerce_json("")
+
+
+class TestEnhancedPrompt(unittest.TestCase):
+    def test_ruleset_block_selected(self):
+        self.assertIn("FHA CODE REFERENCES", build_enhanced_prompt("Floor Plan", "FHA"))
+        type_b = build_enhanced_prompt("Floor Plan", "ANSI_A1171_TYPE_B")
+        self.assertIn("TYPE B CODE REFERENCES", type_b)
+        self.assertNotIn("FHA CODE REFERENCES", type_b)
+
+    def test_region_tag_uses_page_type_guide(self):
+        prompt = build_enhanced_prompt("Interior Elevations", "ANSI_A1171_TYPE_A")
+        self.assertIn("FOCUS AREAS FOR INTERIOR ELEVATIONS:", prompt)
+        self.assertIn("\n1. Grab bar heights", prompt)
+
+    def test_ruleset_block_lives_in_system_prefix(self):
+        system = _openai_system_message("FHA")["content"]
+        self.assertIn("FHA CODE REFERENCES", system)
+        self.assertIs(_openai_system_message("FHA"), _openai_system_message("FHA"))
+
+        page = {"page_index": 0, "page_label": "Floor Plan", "image_url": "https://example.com/p0.png"}
+        content = _build_openai_content("Proj", "FHA", "1/4\"=1'-0\"", [page])
+        page_text = "".join(part.get("text", "") for part in content)
+        self.assertIn("FOCUS AREAS FOR FLOOR PLAN:", page_text)
+        self.assertNotIn("FHA CODE REFERENCES", page_text)
+
+
+class TestNormalizePayload(unittest.TestCase):
+    def _reference(self, require_references):
+        payload = {"pages": [{"issues": [{"severity": "Critical", "finding": "x"}]}]}
+        page = _normalize_payload(payload, "Proj", "FHA", "", [{"page_index": 2}], require_references)["pages"][0]
+        self.assertEqual(page["page_index"], 2)
+        self.assertEqual(page["issues"][0]["severity"], "Low")
+        return page["issues"][0]["reference"]
+
+    def test_missing_reference_flagged_when_required(self):
+        self.assertEqual(self._reference(True), "Reference needed")
+        self.assertIsNone(self._reference(False))
+
+    def test_optional_reference_note_only_in_relaxed_prompt(self):
+        self.assertNotIn("REFERENCE OVERRIDE", _openai_system_message("FHA", True)["content"])
+        relaxed = _openai_system_message("FHA", False)["content"]
+        self.assertTrue(relaxed.startswith(_openai_system_message("FHA", True)["content"]))
+        self.assertIn("REFERENCE OVERRIDE", relaxed)
+
+
+class TestExtraText(unittest.TestCase):
+    def test_clip_keeps_title_block_tail(self):
+        text = "notes " * 2000 + "Title block text (right side):\nA-101 UNIT PLAN"
+        clipped = _clip_extra_text({"extra_text": text})
+        self.assertLessEqual(len(clipped), MAX_EXTRA_TEXT_CHARS + 10)
+        self.assertTrue(clipped.endswith("A-101 UNIT PLAN"))
+
+    def test_repeated_region_text_sent_once(self):
+        regions = [
+            {"page_index": 3, "page_label": "Floor Plan", "tag": tag, "extra_text": "SHEET A-101",
+             "image_url": "https://example.com/p3.png"}
+            for tag in ("Floor Plan", "Interior Elevations")
+        ]
+        texts = [part.get("text", "") for part in _build_openai_content("Proj", "FHA", "", regions)]
+        self.assertEqual(sum("SHEET A-101" in t for t in texts), 1)
+        self.assertIn("Extracted text from this page:\n[same as PAGE 3 above]", texts)
+
+
+class TestBucketPages(unittest.TestCase):
+    def _pages(self, n, tag="Reflected Ceiling Plan", text=""):
+        return [{"page_index": i, "page_label": tag, "tag": tag, "extra_text": text} for i in range(n)]
+
+    def test_output_budget_splits_floor_plans(self):
+        buckets = _bucket_pages(self._pages(5, tag="Floor Plan"), 6400)
+        self.assertEqual([len(b) for b in buckets], [2, 2, 1])
+
+    def test_page_cap_and_input_budget(self):
+        self.assertEqual([len(b) for b in _bucket_pages(self._pages(10), 100_000, max_pages=4)], [4, 4, 2])
+        buckets = _bucket_pages(self._pages(4, text="x" * 2500), 100_000, input_budget=5000)
+        self.assertEqual([len(b) for b in buckets], [2, 2])
+
+
+class TestReviewResponseFormat(unittest.TestCase):
+    def _objects(self, node):
+        if isinstance(node, dict):
+            if "properties" in node:
+                yield node
+            for value in node.values():
+                yield from self._objects(value)
+        elif isinstance(node, list):
+            for value in node:
+                yield from self._objects(value)
+
+    def test_schema_is_strict(self):
+        schema = _REVIEW_RESPONSE_FORMAT["json_schema"]["schema"]
+        objects = list(self._objects(schema))
+        self.assertTrue(objects)
+        for obj in objects:
+            self.assertIs(obj["additionalProperties"], False)
+            self.assertEqual(sorted(obj["required"]), sorted(obj["properties"]))
+            for prop in obj["properties"].values():
+                self.assertNotIn("default", prop)
+        self.assertNotIn("reviewer_note", schema["$defs"]["Issue"]["properties"])
+
+    def test_gemini_schema_drops_reviewer_fields(self):
+        issue = _GEMINI_RESPONSE_SCHEMA["$defs"]["Issue"]
+        self.assertFalse({"issue_id", "reviewer_note", "effective_severity"} & set(issue["properties"]))
+        self.assertEqual(sorted(issue["required"]), sorted(issue["properties"]))
+        self.assertNotIn("additionalProperties", issue)
+
+
+class TestTruncatedResponses(unittest.TestCase):
+    def _client(self, text, finish_reason):
+        async def stream():
+            delta = mock.Mock(content=text)
+            yield mock.Mock(choices=[mock.Mock(delta=delta, finish_reason=finish_reason)])
+
+        client = mock.Mock()
+        client.chat.completions.create = mock.AsyncMock(side_effect=lambda **_: stream())
+        return client
+
+    def _review(self, client, **kwargs):
+        page = {"page_index": 0, "page_label": "A1", "image_url": "data:image/png;base64,"}
+        return asyncio.run(
+            _openai_review_bucket(client, asyncio.Semaphore(1), "Proj", "FHA", "", [page], "gpt-4o", **kwargs)
+        )
+
+    def test_cut_off_response_raises_and_is_not_cached(self):
+        client = self._client('{"pages": [{"page_index": 0, "summ', "length")
+        with mock.patch("src.llm_review.get_cached_response", return_value=None), mock.patch(
+            "src.llm_review.save_cached_response"
+        ) as save:
+            with self.assertRaises(ValueError):
+                self._review(client, max_tokens=100)
+        save.assert_not_called()
+
+    def test_cut_off_response_retried_at_full_cap(self):
+        client = self._client('{"pages": [{"page_index": 0, "summ', "length")
+        with mock.patch("src.llm_review.get_cached_response", return_value=None), mock.patch(
+            "src.llm_review.save_cached_response"
+        ):
+            with self.assertRaises(ValueError):
+                self._review(client)
+        caps = [call.kwargs["max_tokens"] for call in client.chat.completions.create.call_args_list]
+        self.assertEqual(len(caps), 2)
+        self.assertEqual(caps[-1], OPENAI_MAX_TOKENS)
+
+
+class TestImageCaches(unittest.TestCase):
+    def _png(self, size):
+        buf = io.BytesIO()
+        Image.linear_gradient("L").resize(size).save(buf, format="PNG")
+        return buf.getvalue()
+
+    def test_vision_grid_cache_does_not_hold_page_bytes(self):
+        large, small = self._png((2000, 1500)), self._png((400, 300))
+        resized = _fit_to_vision_grid(large)
+        self.assertIs(_fit_to_vision_grid(large), resized)
+        self.assertIs(_fit_to_vision_grid(small), small)
+        for key, value in _VISION_GRID_CACHE.items():
+            self.assertNotIn(large, key)
+            self.assertIsNot(value, large)
+            self.assertIsNot(value, small)
+
+    def test_data_url_cache_keyed_by_digest(self):
+        image = self._png((300, 200))
+        url = _image_to_data_url(image)
+        self.assertTrue(url.startswith("data:image/png;base64,"))
+        self.assertIs(_image_to_data_url(bytes(image)), url)
+        self.assertTrue(all(image not in key for key in _DATA_URL_CACHE))
+
+    def test_dhash_cache_keyed_by_digest(self):
+        image = self._png((300, 200))
+        self.assertEqual(_image_dhash(image), _image_dhash(bytes(image)))
+        self.assertTrue(all(image not in key for key in _DHASH_CACHE))
+
+
+class TestNearDuplicateReuse(unittest.TestCase):
+    def _payload(self, text):
+        buf = io.BytesIO()
+        Image.linear_gradient("L").save(buf, format="PNG")
+        return {"page_index": 7, "page_label": "Floor Plan", "extra_text": text, "png_bytes": buf.getvalue(),
+                "sheet_id_hint": "A-201", "sheet_title_hint": "UNIT B"}
+
+    def _find(self, p):
+        stored = {"page_index": 2, "page_label": "Floor Plan", "sheet_id": "X-1", "sheet_title": "OTHER", "issues": []}
+        row = {"image_hash": _image_dhash(p["png_bytes"]), "page_text": "unit plan a",
+               "page_json": json.dumps(stored)}
+        with mock.patch("src.llm_review.find_page_reviews", return_value=[row]):
+            return _find_near_duplicate(p, "FHA", "model")
+
+    def test_reused_page_takes_this_pages_hints(self):
+        page = self._find(self._payload("Unit plan  A"))
+        self.assertEqual((page["page_index"], page["sheet_id"], page["sheet_title"]), (7, "A-201", "UNIT B"))
+
+    def test_page_without_text_is_not_reused(self):
+        self.assertIsNone(self._find(self._payload("")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+from src.page_classifier import classify_page, is_text_only
+
+
+class TestClassifyPage(unittest.TestCase):
+    def test_multiword_keywords_score_three(self):
+        result = classify_page("reflected ceiling plan")
+        self.assertEqual(result["raw_scores"]["RCP / Ceiling"], 6)
+        self.assertEqual(result["tags"][0]["tag"], "RCP / Ceiling")
+
+    def test_single_letters_do_not_score(self):
+        self.assertEqual(classify_page("ELEVATION A")["raw_scores"]["Interior Elevations"], 1)
+        self.assertEqual(classify_page("ELEVATIONS")["raw_scores"]["Interior Elevations"], 1)
+
+    def test_empty_text(self):
+        result = classify_page("")
+        self.assertEqual(len(result["tags"]), 1)
+        self.assertEqual(result["tags"][0]["confidence"], "Low")
+
+    def test_text_only_sheets(self):
+        self.assertTrue(is_text_only(classify_page("DOOR SCHEDULE  MARK  WIDTH  HEIGHT")))
+        self.assertFalse(is_text_only(classify_page("DOOR SCHEDULE / FLOOR PLAN")))
+        self.assertFalse(is_text_only(classify_page("")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,7 @@ import unittest
 import fitz
 
 from src.annotations import assign_issue_ids
-from src.report_pdf import build_pdf_report
+from src.report_pdf import build_pdf_report, build_pdf_report_async
 from src.schemas import Issue, PageReview, ReviewResult
 
 
@@ -45,6 +45,10 @@ class TestPdfAnnotations(unittest.TestCase):
         text = "".join(page.get_text() for page in doc)
         self.assertIn("[High]", text)
 
+        async_bytes = build_pdf_report_async(review, annotations=annotations).result(timeout=60)
+        doc = fitz.open(stream=async_bytes, filetype="pdf")
+        self.assertIn("[High]", "".join(page.get_text() for page in doc))
+
 
 if __name__ == "__main__":
     unittest.main()
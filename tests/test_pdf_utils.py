@@ -0,0 +1,93 @@
+import io
+import random
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import fitz
+from PIL import Image, ImageEnhance, ImageOps
+
+from src.pdf_utils import (
+    ImageQualityChecker,
+    MeasurementValidator,
+    ScaleVerifier,
+    _autocontrast_lut,
+    _enhance_for_plans,
+    extract_title_block_texts,
+)
+
+
+class TestEnhanceForPlans(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.img = Image.new("RGB", (64, 48))
+        self.img.putdata([(rng.randint(40, 220), rng.randint(60, 200), rng.randint(0, 255)) for _ in range(64 * 48)])
+
+    def test_autocontrast_lut_matches_imageops(self):
+        hist = self.img.histogram()
+        lut = sum((_autocontrast_lut(hist[b * 256:(b + 1) * 256], 1) for b in range(3)), [])
+        self.assertEqual(list(self.img.point(lut).getdata()), list(ImageOps.autocontrast(self.img, cutoff=1).getdata()))
+
+    def test_close_to_enhancer_chain(self):
+        x = ImageOps.autocontrast(self.img, cutoff=1)
+        x = ImageEnhance.Sharpness(x).enhance(1.35)
+        expected = ImageEnhance.Contrast(x).enhance(1.15)
+        fused = _enhance_for_plans(self.img)
+        self.assertEqual(fused.size, self.img.size)
+        diffs = [abs(a - b) for pa, pb in zip(fused.getdata(), expected.getdata()) for a, b in zip(pa, pb)]
+        self.assertLess(sum(diffs) / len(diffs), 2.0)
+
+
+class TestImageQualityChecker(unittest.TestCase):
+    def test_identical_bytes_decoded_once(self):
+        buf = io.BytesIO()
+        Image.new("L", (40, 30), 200).save(buf, format="PNG")
+        png = buf.getvalue()
+        with mock.patch.object(ImageQualityChecker, "_analyze_png", wraps=ImageQualityChecker._analyze_png) as analyze:
+            choice, quality = ImageQualityChecker.choose_best_for_vision(png, png)
+            self.assertEqual(ImageQualityChecker.check_image_quality(png), quality)
+        self.assertEqual(analyze.call_count, 1)
+        self.assertEqual(choice, "base")
+        self.assertEqual(quality["width"], 40)
+
+    def test_concurrent_scoring_with_eviction(self):
+        pngs = []
+        for shade in range(32):
+            buf = io.BytesIO()
+            Image.new("L", (8, 8), shade).save(buf, format="PNG")
+            pngs.append(buf.getvalue())
+        with mock.patch.object(ImageQualityChecker, "CACHE_SIZE", 4), mock.patch.object(
+            ImageQualityChecker, "_cache", {}
+        ):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(ImageQualityChecker.check_image_quality, pngs * 8))
+            self.assertLessEqual(len(ImageQualityChecker._cache), 4)
+        self.assertEqual({r["width"] for r in results}, {8})
+
+
+class TestParsing(unittest.TestCase):
+    def test_parse_dimension_formats(self):
+        validator = MeasurementValidator("FHA")
+        self.assertEqual(validator.parse_dimension("5'-6\""), 66)
+        self.assertEqual(validator.parse_dimension("32.5\""), 32.5)
+        self.assertEqual(validator.parse_dimension("3'"), 36.0)
+        self.assertIsNone(validator.parse_dimension("about 3 feet"))
+
+    def test_parse_scale(self):
+        self.assertEqual(ScaleVerifier.parse_scale("1/4\" = 1'-0\""), 48)
+        self.assertEqual(ScaleVerifier.parse_scale("3/16\" = 1'-0\""), 64.0)
+        self.assertIsNone(ScaleVerifier.parse_scale("NTS"))
+
+
+class TestTitleBlockText(unittest.TestCase):
+    def test_block_crossing_edge_is_dropped(self):
+        for x in (400, 433):
+            doc = fitz.open()
+            page = doc.new_page(width=1000, height=800)
+            page.insert_text((x, 100), "GENERAL NOTES APPLY TO ALL SHEETS IN THIS SET", fontsize=12)
+            page.insert_text((700, 700), "A-101 UNIT PLAN", fontsize=12)
+            self.assertEqual(extract_title_block_texts(doc), ["A-101 UNIT PLAN"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src import storage
+
+
+class TestReviewStorage(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(storage, "DB_PATH", os.path.join(tmp.name, "reviews.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(storage._shared_connection.cache_clear)
+        self.addCleanup(lambda: storage._shared_connection(storage.DB_PATH).close())
+        storage.init_db()
+
+    def test_save_reviews_batch_and_history(self):
+        rows = [("Proj", "FHA", "1/4", json.dumps({"pages": [], "n": n})) for n in range(3)]
+        rows.append(("Other", "FHA", "1/4", json.dumps({"pages": []})))
+        self.assertEqual(storage.save_reviews(rows), 4)
+        history = storage.get_project_review_history("Proj")
+        self.assertEqual(len(history), 3)
+        self.assertEqual({h["result"]["review"]["n"] for h in history}, {0, 1, 2})
+
+    def test_list_reviews_keyset_pages(self):
+        storage.save_reviews([("Proj", "FHA", "1/4", json.dumps({"review": {"n": n}})) for n in range(5)])
+        first = storage.list_reviews("Proj", limit=3)
+        rest = storage.list_reviews("Proj", before_id=first[-1]["id"], limit=3)
+        ids = [r["id"] for r in first + rest]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(set(ids)), 5)
+        self.assertNotIn("result", first[0])
+        self.assertEqual(storage.get_review_json(ids[-1]), {"review": {"n": 0}})
+        self.assertIsNone(storage.get_review_json(999))
+
+    def test_legacy_text_timestamps_are_migrated(self):
+        with storage._connect() as conn:
+            conn.execute("DROP TABLE reviews")
+            conn.execute(
+                "CREATE TABLE reviews (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT, "
+                "project_name TEXT, ruleset TEXT, scale_note TEXT, result_json TEXT)"
+            )
+            conn.execute(
+                "INSERT INTO reviews (created_at, project_name, ruleset, scale_note, result_json) "
+                "VALUES ('2020-01-02T03:04:05.678901', 'Proj', 'FHA', '', '{}')"
+            )
+        storage.init_db()
+        storage.save_review("Proj", "FHA", "", json.dumps({"pages": []}))
+        history = storage.get_project_review_history("Proj")
+        self.assertEqual(history[1]["created_at"], "2020-01-02T03:04:05.678901")
+        self.assertRegex(history[0]["created_at"], r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}$")
+        with storage._connect() as conn:
+            ts = conn.execute("SELECT created_at_ts FROM reviews WHERE id = ?", (history[1]["id"],)).fetchone()[0]
+        self.assertEqual(ts, 1577934245)
+
+    def test_history_uses_project_index(self):
+        storage.save_review("Proj", "FHA", "1/4", json.dumps({"pages": []}))
+        with storage._connect() as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM reviews WHERE project_name = ? ORDER BY created_at_ts DESC, id DESC",
+                ("Proj",),
+            ).fetchall()
+        plan = " ".join(str(row) for row in plan)
+        self.assertIn("idx_reviews_project_created_ts", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_compare_saved_reviews_matches_in_memory_compare(self):
+        def review(hints):
+            issues = [{"location_hint": h, "severity": "High"} for h in hints]
+            return {"pages": [{"page_index": 1, "issues": issues}]}
+
+        old, new = review(["Bath", "Bath", "Kitchen"]), review(["Kitchen", "Entry"])
+        old_id = storage.save_review("Proj", "FHA", "1/4", json.dumps({"review": old}))
+        inserted = storage.save_reviews([("Proj", "FHA", "1/4", json.dumps({"review": new}))])
+        self.assertEqual(inserted, 1)
+        saved = storage.compare_saved_reviews(old_id, old_id + 1)
+        expected = storage.compare_reviews(old, new)
+        self.assertEqual(saved.pop("resolved_signatures"), sorted(expected.pop("resolved_signatures")))
+        self.assertEqual(saved.pop("new_issue_signatures"), sorted(expected.pop("new_issue_signatures")))
+        self.assertEqual(saved, expected)
+
+    def test_save_review_with_incomplete_issues(self):
+        review = {
+            "pages": [
+                {
+                    "page_index": 1,
+                    "issues": [{"location_hint": "Bath"}, "bad", {"location_hint": "Bath", "severity": "Low"}],
+                },
+                {"issues": [{"location_hint": "Entry", "severity": "High"}]},
+                "bad",
+            ]
+        }
+        review_id = storage.save_review("Proj", "FHA", "1/4", json.dumps({"review": review}))
+        self.assertEqual(storage.get_review_json(review_id), {"review": review})
+        with storage._connect() as conn:
+            rows = conn.execute("SELECT sig, occurrences FROM issues WHERE review_id = ?", (review_id,)).fetchall()
+        self.assertEqual(rows, [("1:Bath:Low", 1)])
+        self.assertEqual(storage.save_reviews([("Proj", "FHA", "1/4", json.dumps(["not", "a", "review"]))]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()